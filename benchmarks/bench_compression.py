@@ -0,0 +1,49 @@
+from common import ROOT, workspace, timed, report
+
+from os import listdir, path
+
+from pandas import read_csv, read_excel
+from pyarrow import Table
+from pyarrow.parquet import write_table, read_table
+
+from resources.modules.source import COMPRESSION_OPTIONS
+
+"""
+Write time, read time and file size of each compression option,
+ for every bundled example data source.
+"""
+EXAMPLES = ROOT / 'resources' / 'example_data_sources'
+
+
+def load_example(name:str) -> Table:
+    """
+    Read an example source the same way "Update Data" does.
+    """
+    if name.endswith('.csv'):
+        df = read_csv(EXAMPLES / name, encoding_errors='replace')
+    else:
+        df = read_excel(EXAMPLES / name)
+    df.columns = [str(col) for col in df.columns]
+    return Table.from_pandas(df.astype({col: str for col in df if df[col].dtype == object}), preserve_index=False)
+
+
+def main():
+    results = []
+    with workspace():
+        for name in sorted(listdir(EXAMPLES)):
+            table = load_example(name)
+            for option, setting in COMPRESSION_OPTIONS.items():
+                if setting is None:
+                    continue
+                codec, level = setting
+                file = 'saved/data/bench.pqt'
+                write = timed(write_table, table, file, compression=codec, compression_level=level)
+                read = timed(read_table, file)
+                results.append([name[:28], option, '%.2f' % (write * 1000), '%.2f' % (read * 1000),
+                                '%.1f' % (path.getsize(file) / 1024)])
+    report('parquet codecs on example_data_sources',
+           ['source', 'codec', 'write ms', 'read ms', 'size KiB'], results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,33 @@
+from common import workspace, timed, report, run
+
+import numpy as np
+
+from resources.modules.utility import save_data_as_parquet
+
+"""
+Ingest time versus row count for save_data_as_parquet.
+Compare with the per-row shape detection it replaced by running with "--baseline <revision>",
+ the revision before shape and dtype were inferred once per column.
+"""
+ROW_COUNTS = [10_000, 100_000, 1_000_000, 5_000_000]
+
+
+def make_source(rows:int) -> dict:
+    """
+    Flat numeric source with a handful of columns.
+    """
+    rng = np.random.default_rng(0)
+    return {'index': np.arange(rows), 'value': rng.random(rows), 'count': rng.integers(0, 100, rows)}
+
+
+def main():
+    results = []
+    with workspace():
+        for rows in ROW_COUNTS:
+            seconds = timed(lambda: save_data_as_parquet(make_source(rows), 'bench'), repeat=1)
+            results.append([rows, '%.3f' % seconds])
+    report('save_data_as_parquet ingest (seconds)', ['rows', 'seconds'], results)
+
+
+if __name__ == '__main__':
+    run(main)
@@ -0,0 +1,36 @@
+from common import workspace, timed, report, run
+
+import numpy as np
+
+from resources.modules.data import Data
+from resources.modules.utility import save_data_as_parquet
+
+"""
+Saving and loading a 2000x2000 Iso surface.
+Compare with the str(list) shape metadata rebuilt through to_pydict by running with "--baseline <revision>",
+ the revision before Iso shapes were stored as typed field metadata.
+"""
+SIZE = 2000
+
+
+def make_surface() -> dict:
+    """
+    Surface with peaks, as created by IsoPeaks, at a larger size.
+    """
+    x, y = np.meshgrid(np.linspace(-6, 6, SIZE), np.linspace(-6, 6, SIZE))
+    return {'x_coordinate': x, 'y_coordinate': y, 'z_coordinate': np.sin(np.sqrt(x ** 2 + y ** 2))}
+
+
+def main():
+    with workspace():
+        save = timed(lambda: save_data_as_parquet(make_surface(), 'iso'), repeat=1)
+        data = Data(None)
+        iso_id = data.pqt_sources.index('iso')
+        load = timed(data.get_df, iso_id)
+        loaded, name = data.get_df(iso_id)
+        assert loaded['z_coordinate'].shape == (SIZE, SIZE)
+    report('%sx%s iso surface (seconds)' % (SIZE, SIZE), ['save', 'load'], [['%.3f' % save, '%.3f' % load]])
+
+
+if __name__ == '__main__':
+    run(main)
@@ -0,0 +1,71 @@
+from common import ROOT, timed, report, run
+
+from copy import deepcopy
+from os import environ, listdir
+
+environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from pandas import read_csv, read_excel
+from PyQt6.QtWidgets import QApplication, QScrollArea, QWidget
+
+from resources.modules.plotting import RenderPlot
+from resources.modules.utility import PLOT
+
+"""
+Render time of a Bar Plot of the first two columns of each bundled example data source,
+ counting canvas draws per render.
+Compare with drawing, measuring every tick label and drawing again by running with "--baseline <revision>",
+ the revision before plots were laid out from estimated label sizes.
+"""
+EXAMPLES = ROOT / 'resources' / 'example_data_sources'
+GRAPH = 'Bar Plot'
+
+
+class BenchPlotMap(QWidget):
+    def __init__(self, data, x:str, y:str):
+        """
+        Stand in for a PlotMap, holding only what RenderPlot reads from it.
+        """
+        super().__init__()
+        self.plot_map = deepcopy(PLOT)
+        self.plot_map.update({'data': data, 'graph_name': GRAPH, 'x_coord': x, 'y_coord': y})
+        self.source = None
+        self.decimation = None
+        self.canvas_scroll_area = QScrollArea()
+        self.canvas_scroll_area.resize(800, 400)
+        self.plot_canvas = RenderPlot(self)
+        self.draws = 0
+        draw = self.plot_canvas.canvas.draw
+        def counted_draw():
+            self.draws += 1
+            draw()
+        self.plot_canvas.canvas.draw = counted_draw
+
+    def load_columns(self, columns:list[str]):
+        pass
+
+
+def load_example(name:str):
+    """
+    Read an example source, keeping its first two columns.
+    """
+    df = read_csv(EXAMPLES / name, encoding_errors='replace') if name.endswith('.csv') else read_excel(EXAMPLES / name)
+    df.columns = [str(col) for col in df.columns]
+    return df[df.columns[:2]]
+
+
+def main():
+    app = QApplication([])
+    results = []
+    for name in sorted(listdir(EXAMPLES)):
+        data = load_example(name)
+        plot = BenchPlotMap(data, *data.columns)
+        plot.draws = 0
+        seconds = timed(plot.plot_canvas.run)
+        results.append([name[:28], len(data), '%.1f' % (seconds * 1000), plot.draws // 3])
+    report('%s render time on example_data_sources' % GRAPH, ['source', 'rows', 'ms', 'draws'], results)
+    app.quit()
+
+
+if __name__ == '__main__':
+    run(main)
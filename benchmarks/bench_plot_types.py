@@ -0,0 +1,74 @@
+from common import timed, report
+
+from sys import argv
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from pandas import Series
+
+from resources.modules.plotting import PLOT_TYPES
+
+"""
+Draw time of each registered plot type on its own, on an off screen canvas.
+Flat and Tri plot types are drawn with POINTS rows, Iso plot types on a SIZE x SIZE grid.
+A plot type name can be given to time only that one, e.g. "python benchmarks/bench_plot_types.py 'Bar Plot'".
+"""
+POINTS = 10_000
+SIZE = 200
+
+
+def axes_data(shape:str) -> tuple:
+    """
+    X, y and z data of the shape a plot type accepts.
+    """
+    rng = np.random.default_rng(0)
+    if shape == 'iso':
+        x, y = np.meshgrid(np.linspace(-6, 6, SIZE), np.linspace(-6, 6, SIZE))
+        return x, y, np.sin(np.sqrt(x ** 2 + y ** 2))
+    x, y = rng.integers(0, 100, POINTS).astype(float), rng.integers(0, 100, POINTS).astype(float)
+    z = np.sin(x / 10) * np.cos(y / 10) + 2
+    if shape == 'tri':
+        return x, y, z
+    return Series(x), Series(y), Series(z)
+
+
+def stat_of(x, y, z):
+    """
+    Stat function over the axes data, as RenderPlot.column_stat computes without saved stats.
+    """
+    data = {'x': Series(np.ravel(x)), 'y': Series(np.ravel(y)), 'z': Series(np.ravel(z))}
+    def stat(axis:str, name:str):
+        return data[axis].nunique(dropna=False) if name == 'distinct' else getattr(data[axis], name)()
+    return stat
+
+
+def draw(name:str, data:tuple, stat):
+    """
+    Draw a plot type and render the canvas once,
+     passing only the coordinates it uses as RenderPlot.run does.
+    """
+    fig = Figure(dpi=100)
+    canvas = FigureCanvasAgg(fig)
+    iso = PLOT_TYPES[name].shape != 'flat' or name[:3] == '3-D'
+    ax = fig.add_subplot(projection='3d') if iso else fig.add_subplot()
+    x, y, z = (value if axis in PLOT_TYPES[name].axes else None for axis, value in zip('xyz', data))
+    PLOT_TYPES[name](ax, x, y, z, stat)
+    canvas.draw()
+
+
+def main():
+    names = argv[1:] or list(PLOT_TYPES)
+    results = []
+    for name in names:
+        data = axes_data(PLOT_TYPES[name].shape)
+        try:
+            seconds = timed(draw, name, data, stat_of(*data))
+            results.append([name, PLOT_TYPES[name].shape, '%.1f' % (seconds * 1000)])
+        except (TypeError, ValueError) as e:
+            results.append([name, PLOT_TYPES[name].shape, 'failed: %s' % e])
+    report('plot type draw time', ['plot type', 'shape', 'ms'], results)
+
+
+if __name__ == '__main__':
+    main()
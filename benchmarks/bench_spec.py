@@ -0,0 +1,78 @@
+from common import workspace, report, run
+
+import builtins
+from json import dump, load
+from threading import Lock
+from time import perf_counter
+
+from PyQt6.QtCore import QCoreApplication, QThreadPool
+
+from resources.modules.source import UpdateSpecSource
+
+"""
+Disk writes of spec.json and time taken to add a batch of sources,
+ each through an UpdateSpecSource on the add source thread pool.
+Compare with the locked read-modify-write of spec.json per source by running with "--baseline <revision>",
+ the revision before the spec was served from one in-memory copy.
+"""
+SOURCE_COUNTS = [10, 100]
+
+
+def spec_owner():
+    """
+    What UpdateSpecSource is given to guard the spec with,
+     the spec service, or the mutex of revisions before it.
+    """
+    try:
+        from resources.modules.spec import SpecService
+        return SpecService(delay=50)
+    except ImportError:
+        from PyQt6.QtCore import QMutex
+        return QMutex()
+
+
+def add_sources(count:int) -> tuple[float, int]:
+    """
+    Add sources from the thread pool until every one is written to spec.json,
+     counting each time spec.json, or the temporary file renamed over it, is opened to write.
+    """
+    paths = []
+    for i in range(count):
+        paths.append('saved/sources/sample_%s.csv' % i)
+        with open(paths[-1], 'w') as f: f.write('x,y\n%s,%s\n' % (i, i))
+    writes, lock, builtin_open = [0], Lock(), builtins.open
+    def counted_open(file, mode='r', *args, **kwargs):
+        if 'w' in mode and str(file).endswith(('spec.json', 'spec.json.tmp')):
+            with lock: writes[0] += 1
+        return builtin_open(file, mode, *args, **kwargs)
+    owner = spec_owner()
+    pool = QThreadPool()
+    builtins.open = counted_open
+    try:
+        start = perf_counter()
+        for i, path in enumerate(paths):
+            pool.start(UpdateSpecSource(owner, 'sample_%s.csv' % i, path))
+        pool.waitForDone()
+        if hasattr(owner, 'flush'):
+            owner.flush()
+        seconds = perf_counter() - start
+    finally:
+        builtins.open = builtin_open
+    return seconds, writes[0]
+
+
+def main():
+    app = QCoreApplication([])
+    results = []
+    with workspace():
+        for count in SOURCE_COUNTS:
+            with open('saved/spec.json', 'w') as f: dump({'sources': {}}, f)
+            seconds, writes = add_sources(count)
+            with open('saved/spec.json', 'r') as f: saved = len(load(f)['sources'])
+            results.append([count, writes, '%.3f' % seconds, saved])
+    report('adding sources to spec.json', ['sources', 'writes', 'seconds', 'saved'], results)
+    app.quit()
+
+
+if __name__ == '__main__':
+    run(main)
@@ -0,0 +1,88 @@
+from common import workspace, timed, report
+
+from sqlite3 import connect
+
+from pyarrow.dataset import dataset
+
+from resources.modules.data import data_files
+from resources.modules.sql_connect import ingest_sql, SQL_SOURCE, FETCH_SIZE
+
+"""
+Checks and times SQL sources read from a local SQLite file through ingest_sql,
+ a full read with a column empty through its whole first batch,
+ a watermark refresh with new rows and without, and a query with no rows.
+Every case is checked against the rows in the database before it is timed.
+"""
+ROWS = 200_000
+NULL_ROWS = FETCH_SIZE + 5
+
+
+def make_database(path:str, rows:int):
+    """
+    SQLite table of increasing ids, a REAL column left empty in its first rows and a text column.
+    """
+    with connect(path) as conn:
+        conn.execute('CREATE TABLE readings (id INTEGER, value REAL, label TEXT)')
+        conn.executemany('INSERT INTO readings VALUES (?, ?, ?)',
+                         ((i, None if i < NULL_ROWS else i / 2, 'label %s' % (i % 10)) for i in range(rows)))
+
+
+def add_rows(path:str, start:int, rows:int):
+    """
+    Append rows continuing the ids of the table.
+    """
+    with connect(path) as conn:
+        conn.executemany('INSERT INTO readings VALUES (?, ?, ?)',
+                         ((i, i / 2, 'label %s' % (i % 10)) for i in range(start, start + rows)))
+
+
+def read_source(name:str):
+    """
+    Saved rows of a SQL source as a table.
+    """
+    return dataset([str(path) for path in data_files(name)], format='parquet').to_table()
+
+
+def check(condition:bool, message:str):
+    """
+    Stop the benchmark if a case read the database wrongly.
+    """
+    if not condition:
+        raise AssertionError(message)
+
+
+def main():
+    results = []
+    with workspace() as tmp:
+        database = str(tmp / 'bench.sqlite')
+        make_database(database, ROWS)
+        spec = {'sources': {}, 'ipc_cache': False}
+        source = dict(SQL_SOURCE, database=database, query='SELECT * FROM readings', watermark='id')
+
+        state = ingest_sql('readings', source, spec, None)
+        table = read_source('readings')
+        check(table.num_rows == ROWS, 'full read has %s rows, not %s' % (table.num_rows, ROWS))
+        check(str(table.schema.field('value').type) == 'double',
+              'column null through the first batch read as %s' % table.schema.field('value').type)
+        check(state['watermark'] == ROWS - 1, 'watermark %s, not %s' % (state['watermark'], ROWS - 1))
+        results.append(['full read', ROWS, '%.1f' % (timed(ingest_sql, 'readings', source, spec, None) * 1000)])
+
+        check(ingest_sql('readings', source, spec, state) is None, 'refresh without new rows rewrote the source')
+        results.append(['refresh, no new rows', 0,
+                        '%.1f' % (timed(ingest_sql, 'readings', source, spec, state) * 1000)])
+
+        add_rows(database, ROWS, ROWS // 10)
+        refreshed = ingest_sql('readings', source, spec, state)
+        table = read_source('readings')
+        check(table.num_rows == ROWS + ROWS // 10, 'refresh has %s rows' % table.num_rows)
+        check(refreshed['watermark'] == ROWS + ROWS // 10 - 1, 'refresh watermark %s' % refreshed['watermark'])
+
+        empty = dict(source, query='SELECT * FROM readings WHERE id < 0', watermark='')
+        ingest_sql('empty', empty, spec, None)
+        check(read_source('empty').num_rows == 0, 'query with no rows did not save an empty source')
+        results.append(['no rows', 0, '%.1f' % (timed(ingest_sql, 'empty', empty, spec, None) * 1000)])
+    report('SQLite source read time', ['case', 'rows', 'ms'], results)
+
+
+if __name__ == '__main__':
+    main()
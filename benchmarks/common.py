@@ -0,0 +1,104 @@
+import sys
+from contextlib import contextmanager
+from io import BytesIO
+from json import dump
+from os import chdir, environ, getcwd, makedirs
+from pathlib import Path
+from subprocess import run as run_process
+from tarfile import open as open_tar
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+"""
+Shared helpers for the benchmark scripts.
+Benchmarks are run from the repository root, e.g. "python benchmarks/bench_ingest.py".
+Adding "--baseline <revision>" runs the benchmark again against the code of an earlier revision,
+ e.g. the parent of the commit it measures, so before and after both time the code as shipped.
+"""
+REPOSITORY = Path(__file__).parent.parent
+
+"""
+Tree the benchmarked code is imported from, the repository unless run against a baseline revision.
+"""
+ROOT = Path(environ.get('BENCH_ROOT', REPOSITORY))
+
+"""
+Revision the benchmarked code is from, shown with each report.
+"""
+REVISION = environ.get('BENCH_REVISION', 'working tree')
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+
+@contextmanager
+def workspace():
+    """
+    Runs the enclosed block inside a throw away copy of the saved folder structure,
+     so benchmarks never touch the user's own saved data.
+    Holds an empty spec.json, for code reading the spec through the spec service.
+    :return: Path of the temporary workspace.
+    """
+    cwd = getcwd()
+    with TemporaryDirectory() as tmp:
+        chdir(tmp)
+        makedirs('saved/data', exist_ok=True)
+        makedirs('saved/plots', exist_ok=True)
+        makedirs('saved/sources', exist_ok=True)
+        with open('saved/spec.json', 'w') as f:
+            dump({'sources': {}}, f)
+        try:
+            yield Path(tmp)
+        finally:
+            chdir(cwd)
+
+
+def timed(func, *args, repeat:int=3, **kwargs) -> float:
+    """
+    Best of a number of runs of a single call.
+    :param func: Function to time.
+    :param repeat: Number of runs.
+    :return: Fastest run in seconds.
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        start = perf_counter()
+        func(*args, **kwargs)
+        best = min(best, perf_counter() - start)
+    return best
+
+
+def report(title:str, header:list[str], rows:list[list]):
+    """
+    Prints a plain text table of benchmark results.
+    :param title: Benchmark name.
+    :param header: Column names.
+    :param rows: Result rows, same length as header.
+    """
+    widths = [max(len(str(cell)) for cell in column) for column in zip(header, *rows)]
+    print('\n%s (%s)' % (title, REVISION))
+    print('  '.join(str(h).rjust(w) for h, w in zip(header, widths)))
+    for row in rows:
+        print('  '.join(str(c).rjust(w) for c, w in zip(row, widths)))
+
+
+def run(main):
+    """
+    Run a benchmark, then again against a baseline revision if "--baseline <revision>" is given.
+    The baseline runs this same benchmark script,
+     importing the code of that revision from a copy exported with git archive.
+    :param main: Benchmark main function, reading any other arguments from sys.argv.
+    """
+    revision = None
+    if '--baseline' in sys.argv:
+        i = sys.argv.index('--baseline')
+        revision = sys.argv[i + 1]
+        del sys.argv[i:i + 2]
+    main()
+    if revision is None:
+        return
+    with TemporaryDirectory() as tree:
+        archive = run_process(['git', 'archive', revision], cwd=REPOSITORY, capture_output=True, check=True)
+        with open_tar(fileobj=BytesIO(archive.stdout)) as tar:
+            tar.extractall(tree)
+        run_process([sys.executable, str(Path(sys.argv[0]).resolve()), *sys.argv[1:]], check=True,
+                    env=dict(environ, BENCH_ROOT=tree, BENCH_REVISION=revision))
@@ -1,7 +1,8 @@
 from __future__ import annotations
 
+from copy import deepcopy
 from json import dump
-from json import load
+from multiprocessing import freeze_support
 from os import listdir
 from os import makedirs, remove
 from pathlib import Path
@@ -13,10 +14,16 @@ from PyQt6.QtWidgets import (QApplication, QComboBox, QHBoxLayout, QMainWindow,
                              QGridLayout, QDialog, QTabWidget, QMessageBox, QProgressBar, QSlider)
 from win32ctypes.pywin32.pywintypes import datetime
 
+from resources.modules.catalog import catalog
+from resources.modules.data import DATASET_FILE_ROWS
+from resources.modules.density import DENSITY_POINTS
+from resources.modules.ingest import CSV_BLOCK_SIZE
 from resources.modules.output import OutputOptions
+from resources.modules.plot_map import PlotMap, PlotMapPlaceholder
 from resources.modules.source import Source, UpdateSources
+from resources.modules.spec import spec_service
 from resources.modules.stylesheets import tabs
-from resources.modules.utility import load_plot_maps, save_plot_map, resource_path
+from resources.modules.utility import load_plot_maps, save_plot_map, resource_path, COMPRESSION, ENCODING_SAMPLE
 
 
 def create_saves():
@@ -29,10 +36,15 @@ def create_saves():
     makedirs('saved/plots', exist_ok=True)
     makedirs('saved/outputs', exist_ok=True)
     makedirs('saved/sources', exist_ok=True)
+    makedirs('saved/cache', exist_ok=True)
     # if not Path('saved/sources/winequality-red.csv').exists():
     if not Path('saved/spec.json').exists():
         with open(Path(r'saved/spec.json').absolute(), 'w') as f:
-            dump({'sources': {}, 'source_dir': '', 'output_dir': ''}, f)
+            dump({'sources': {}, 'source_dir': '', 'output_dir': '', 'compression': COMPRESSION, 'ipc_cache': True,
+                  'ingest_workers': 0, 'csv_block_size': CSV_BLOCK_SIZE,
+                  'encoding_sample': ENCODING_SAMPLE, 'encodings': {}, 'json_flatten': True,
+                  'dataset_file_rows': DATASET_FILE_ROWS, 'sort_by': {}, 'arrow_frames': False,
+                  'density_points': DENSITY_POINTS}, f)
 
 
 class MainWindow(QMainWindow):
@@ -52,12 +64,23 @@ class MainWindow(QMainWindow):
         self.setWindowIcon(self.icon)
         self.resize(1200, 800)
         # SPEC
-        with open('saved/spec.json', 'r') as f:
-            self.spec = load(f)
+        self.spec_service = spec_service()
+        self.spec = self.spec_service.spec
+        self.spec.setdefault('compression', deepcopy(COMPRESSION))
+        self.spec.setdefault('ipc_cache', True)
+        self.spec.setdefault('ingest_workers', 0)
+        self.spec.setdefault('csv_block_size', CSV_BLOCK_SIZE)
+        self.spec.setdefault('encoding_sample', ENCODING_SAMPLE)
+        self.spec.setdefault('json_flatten', True)
+        self.spec.setdefault('dataset_file_rows', DATASET_FILE_ROWS)
+        self.spec.setdefault('sort_by', {})
+        self.spec.setdefault('arrow_frames', False)
+        self.spec.setdefault('density_points', DENSITY_POINTS)
         # LOAD SOURCES
         self.sources = [source for source in listdir('saved/sources')]
+        self.sources += ['%s.sql' % name for name in self.spec.get('sql_sources', {})]
         # LOAD PLOTS
-        self.plots = [plot for plot in load_plot_maps(self, True)]  # temporary storage of PlotMap objects
+        self.plots = [plot for plot in load_plot_maps(self, True)]  # PlotMap objects, placeholders until shown
 
         # UPDATE DATA ACTION
         self.update_data_action = QAction('Need to Obtain Valid Data Sources', self)
@@ -128,6 +151,7 @@ class MainWindow(QMainWindow):
         # PROGRESS BAR
         self.prog_val = QSlider()
         self.progress = None
+        self.refresh_counts = (0, 0)
         # POPULATE TABS
         for p in self.plots:
             self.tabs.addTab(p, 'PLOT %s' % p.plot_map['id'])
@@ -173,7 +197,33 @@ class MainWindow(QMainWindow):
             self.removed_tabs.append(plot.id)
             self.tabs.removeTab(index)
         else:
-            [s.settings.close() for s in self.plots]
+            [s.settings.close() for s in self.built_plots()]
+            self.spec_service.flush()
+
+    def built_plots(self) -> list[PlotMap]:
+        """
+        PlotMap instances that have been built,
+         excluding tabs not yet shown.
+        :return: List of PlotMap.
+        """
+        return [plot for plot in self.plots if isinstance(plot, PlotMap)]
+
+    def build_plot(self, index:int):
+        """
+        Replaces a placeholder tab with its full PlotMap,
+         the first time the tab is activated.
+        :param index: Tab index.
+        """
+        placeholder = self.tabs.widget(index)
+        if isinstance(placeholder, PlotMapPlaceholder):
+            plot = placeholder.build()
+            self.plots[self.plots.index(placeholder)] = plot
+            self.tabs.blockSignals(True)
+            self.tabs.removeTab(index)
+            self.tabs.insertTab(index, plot, 'PLOT %s' % plot.plot_map['id'])
+            self.tabs.setCurrentIndex(index)
+            self.tabs.blockSignals(False)
+            placeholder.deleteLater()
 
     def changeEvent(self, index:int):
         """
@@ -181,7 +231,8 @@ class MainWindow(QMainWindow):
         :param index: current tab index
         """
         if isinstance(index, int):
-            if [True for s in self.plots if s.settings.isVisible()]:
+            self.build_plot(index)
+            if [True for s in self.built_plots() if s.settings.isVisible()]:
                 self.plot_settings()
             if self.output_win.isVisible():
                 self.output_win.output_name.setText(self.plots[self.tabs.currentIndex()].plot_map['title'])
@@ -192,7 +243,7 @@ class MainWindow(QMainWindow):
         """
         if self.tabs:
             if not self.plots[self.tabs.currentIndex()].settings.isVisible():
-                [s.settings.hide() for s in self.plots]
+                [s.settings.hide() for s in self.built_plots()]
                 self.plots[self.tabs.currentIndex()].settings.show()
         else:
             self.no_plot_msg()
@@ -223,7 +274,7 @@ class MainWindow(QMainWindow):
         Starts the update primary sources thread.
         """
         self.progress = QProgressBar(self)
-        self.prog_val.setValue(14 + (len(listdir('saved/sources')) * 2) + 5)
+        self.prog_val.setValue(14 + ((len(listdir('saved/sources')) + len(self.spec.get('sql_sources', {}))) * 2) + 5)
         self.prog_val.valueChanged.connect(self.progress.setValue)
         self.progress.setRange(self.prog_val.value(), self.prog_val.value() + self.prog_val.value())
         self.toolbar.addWidget(self.progress)
@@ -235,10 +286,12 @@ class MainWindow(QMainWindow):
         Updates progress bar while update thread is running.
         Opens a warning window if there is an issue found,
          with any of the primary source data attributes.
+        Shows how many sources were skipped as unchanged and how many were refreshed.
         :param progress: Update thread progress.
         """
         parent = self
-        if self.plots and self.plots[self.tabs.currentIndex()].settings.isVisible():
+        if self.plots and isinstance(self.plots[self.tabs.currentIndex()], PlotMap) \
+                and self.plots[self.tabs.currentIndex()].settings.isVisible():
             parent = self.plots[self.tabs.currentIndex()].settings
         if progress[:7] == 'invalid':
             QMessageBox.critical(parent, "Source Location Invalid",
@@ -250,9 +303,12 @@ class MainWindow(QMainWindow):
             QMessageBox.critical(parent, "Source Update Failed",
                                  'Primary Data Source Update Failed for\n%s.\n'
                                  'Verify Data is in Valid Format.\n'
-                                 '( .csv, .json, .xls(*) )' % progress[7:],
+                                 '( .csv, .json, .ndjson, .xls(*), SQL )' % progress[7:],
                                  buttons=QMessageBox.StandardButton.Ok,
                                  defaultButton=QMessageBox.StandardButton.Ok)
+        elif progress[:7] == 'refresh':
+            self.refresh_counts = tuple(int(count) for count in progress[8:].split())
+            self.progress.setFormat('%s Skipped, %s Refreshed  %%p%%' % self.refresh_counts)
         else:
             self.prog_val.setValue(self.prog_val.value() + int(progress))
 
@@ -263,12 +319,16 @@ class MainWindow(QMainWindow):
         Re-initializes the update thread object.
         """
         self.prog_val.setValue(self.prog_val.value() + 1)
-        if self.plots:
-            [plot.settings.update_combo_boxes() for plot in self.plots]
-            [plot.settings.set_data(plot.settings.data_selector.findText(plot.plot_map['data_name'])) for plot in self.plots]
-            if self.plots[self.tabs.currentIndex()].validate_data():
+        catalog().refresh()
+        if self.built_plots():
+            [plot.settings.update_combo_boxes() for plot in self.built_plots()]
+            [plot.settings.set_data(plot.settings.data_selector.findText(plot.plot_map['data_name']))
+             for plot in self.built_plots()]
+            if isinstance(self.plots[self.tabs.currentIndex()], PlotMap) \
+                    and self.plots[self.tabs.currentIndex()].validate_data():
                 self.plots[self.tabs.currentIndex()].run_plot()
-        self.update_data_action.setText('DATA UPDATED: %s' % datetime.today().strftime('%c'))
+        self.update_data_action.setText('DATA UPDATED: %s  (%s Skipped, %s Refreshed)'
+                                        % ((datetime.today().strftime('%c'),) + self.refresh_counts))
         if self.update_thread.isFinished():
             self.update_thread = UpdateSources(self)
             self.update_thread.progress.connect(self.data_updating)
@@ -344,6 +404,7 @@ class MainWindow(QMainWindow):
 
 
 if __name__ == "__main__":
+    freeze_support()
     create_saves()
     app = QApplication(argv)
     mw = MainWindow()
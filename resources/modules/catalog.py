@@ -0,0 +1,130 @@
+from os import listdir
+from pathlib import Path
+from typing import Union
+
+from PyQt6.QtCore import QObject, QTimer, QFileSystemWatcher, pyqtSignal
+from pyarrow import Schema
+
+from resources.modules.data import data_files, parquet_version, source_schema, source_rows, column_shapes
+from resources.modules.stats import read_stats
+
+"""
+Milliseconds after the data folder changes before the catalog is refreshed,
+ so a burst of writes is read once.
+"""
+CATALOG_REFRESH_DELAY = 200
+
+
+class DatasetEntry:
+    def __init__(self, name:str, version:bytes):
+        """
+        Metadata of a saved parquet data source,
+         read from its file footers once per version.
+        :param name: Name of parquet data source without file extension.
+        :param version: Version stamp of the data source.
+        """
+        self.name = name
+        self.version = version
+        self.schema:Schema = source_schema(name)
+        self.columns:list[str] = self.schema.names
+        self.rows:int = source_rows(name)
+        self.size:int = sum(file.stat().st_size for file in data_files(name))
+        self.shapes:dict[str, tuple[int, ...]] = column_shapes(self.schema)
+        self.stats:dict[str, dict] = read_stats(name)
+
+
+class Catalog(QObject):
+    changed = pyqtSignal()
+    def __init__(self, folder:str='saved/data', delay:int=CATALOG_REFRESH_DELAY):
+        """
+        Schema, row count, byte size, shape, column stats and version of every saved parquet data source,
+         kept current by watching the data folder.
+        Selectors and validators query the catalog instead of listing the folder or opening parquet files.
+        :param folder: Data folder.
+        :param delay: Milliseconds after a change before refreshing.
+        """
+        super().__init__()
+        self.folder = folder
+        self.entries:dict[str, DatasetEntry] = {}
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(delay)
+        self.timer.timeout.connect(self.refresh)
+        self.watcher = QFileSystemWatcher([folder], self)
+        self.watcher.directoryChanged.connect(lambda path: self.timer.start())
+        self.refresh()
+
+    def refresh(self):
+        """
+        List the data folder, reading metadata only of data sources that are new or rewritten.
+        Signals changed if any data source was added, rewritten or removed.
+        """
+        names = [pqt[:-4] for pqt in listdir(self.folder) if pqt.endswith('.pqt')]
+        changed = set(self.entries) - set(names)
+        for name in changed:
+            self.entries.pop(name)
+        for name in names:
+            if self.refresh_entry(name, False):
+                changed.add(name)
+        if changed:
+            self.changed.emit()
+
+    def refresh_entry(self, name:str, signal:bool=True) -> bool:
+        """
+        Update the entry of a single data source,
+         called after it is written or removed in this process so it is current without waiting.
+        Column stats are read again while missing, as they are saved just after the data.
+        :param name: Name of parquet data source without file extension.
+        :param signal: Signal changed if the entry changed.
+        :return: True if the entry changed.
+        """
+        try:
+            version = parquet_version(name)
+        except FileNotFoundError:
+            version = None
+        entry = self.entries.get(name)
+        if entry is not None and entry.version == version:
+            if not entry.stats:
+                entry.stats = read_stats(name)
+            return False
+        if version is None:
+            self.entries.pop(name, None)
+        else:
+            try:
+                self.entries[name] = DatasetEntry(name, version)
+            except (OSError, ValueError):
+                return False
+        if signal:
+            self.changed.emit()
+        return True
+
+    def names(self) -> list[str]:
+        """
+        Names of all saved data sources.
+        :return: Sorted list of data source names.
+        """
+        return sorted(self.entries)
+
+    def get(self, name:str) -> Union[DatasetEntry, None]:
+        """
+        Metadata of a data source, as last read, without touching the disk.
+        Kept current by the folder watcher, and by refresh_entry after writes in this process.
+        :param name: Name of parquet data source without file extension.
+        :return: DatasetEntry, None if it is not saved.
+        """
+        return self.entries.get(name)
+
+
+CATALOG:Union[Catalog, None] = None
+
+
+def catalog() -> Catalog:
+    """
+    The application's dataset catalog, created on first use.
+    :return: Catalog.
+    """
+    global CATALOG
+    if CATALOG is None:
+        Path('saved/data').mkdir(parents=True, exist_ok=True)
+        CATALOG = Catalog()
+    return CATALOG
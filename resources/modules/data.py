@@ -1,61 +1,600 @@
 from ast import literal_eval
 from copy import deepcopy
-from os import listdir
+from json import loads
+from os import makedirs, replace, remove
+from pathlib import Path
+from shutil import rmtree
 from typing import Tuple, Union
 
 import numpy as np
-from numpy import array
-from pandas import DataFrame
-from pyarrow.parquet import read_table
+from pandas import DataFrame, Series, ArrowDtype
+from pyarrow import Schema, ChunkedArray, Table, ArrowInvalid, memory_map, ipc, types
+from pyarrow.dataset import dataset
+from pyarrow.parquet import (read_table, read_schema, read_metadata, write_table, ParquetFile,
+                             filters_to_expression)
+
+"""
+Rows per parquet row group of flat data sources,
+ small enough that filtered reads can skip row groups by their statistics.
+"""
+ROW_GROUP_ROWS = 1 << 17
+
+"""
+Flat data sources with more rows than this are saved as a partitioned dataset,
+ a directory of parquet files in place of a single file.
+"""
+DATASET_FILE_ROWS = 1 << 23
+
+
+def data_path(name:str) -> Path:
+    """
+    Path of a saved parquet data source,
+     a single file, or a directory of parquet files for a partitioned dataset.
+    :param name: Name of parquet data source without file extension.
+    :return: Path to data source.
+    """
+    return Path('saved/data/%s.pqt' % name)
+
+
+def data_files(name:str) -> list[Path]:
+    """
+    Parquet files of a saved data source, in order.
+    :param name: Name of parquet data source without file extension.
+    :return: Paths of parquet files, empty if data source does not exist.
+    """
+    path = data_path(name)
+    if path.is_dir():
+        return sorted(path.glob('*.parquet'))
+    return [path] if path.exists() else []
+
+
+def replace_data(temp:str, name:str):
+    """
+    Move a completely written parquet file or dataset directory into place as a data source,
+     replacing any previous write of either kind.
+    :param temp: Path of written file or directory.
+    :param name: Name of parquet data source without file extension.
+    """
+    path = data_path(name)
+    if path.is_dir():
+        rmtree(path)
+    elif path.exists() and Path(temp).is_dir():
+        remove(path)
+    replace(temp, path)
+
+
+def temp_parts(name:str) -> str:
+    """
+    Empty temporary directory to write the parquet files of a data source into.
+    :param name: Name of parquet data source without file extension.
+    :return: Path of temporary directory.
+    """
+    temp = 'saved/cache/%s.pqt.tmp' % name
+    if Path(temp).is_dir():
+        rmtree(temp)
+    elif Path(temp).exists():
+        remove(temp)
+    makedirs(temp)
+    return temp
+
+
+def part_path(temp:str, part:int) -> str:
+    """
+    Path of a numbered parquet file within a temporary directory.
+    :param temp: Path of temporary directory.
+    :param part: Part number.
+    :return: Path of part file.
+    """
+    return '%s/part-%05d.parquet' % (temp, part)
+
+
+def publish_parts(temp:str, name:str):
+    """
+    Move written parquet files into place as a data source,
+     a single file if there is only one, otherwise a partitioned dataset directory.
+    :param temp: Path of temporary directory holding part files.
+    :param name: Name of parquet data source without file extension.
+    """
+    parts = sorted(Path(temp).glob('*.parquet'))
+    if len(parts) == 1:
+        replace_data(str(parts[0]), name)
+        rmtree(temp)
+    else:
+        replace_data(temp, name)
+
+
+def write_source(table:Table, name:str, codec:str, level:Union[int, None], row_group_size:int,
+                 file_rows:Union[int, None]=DATASET_FILE_ROWS):
+    """
+    Write a table as a parquet data source,
+     split into a partitioned dataset of file_rows rows per file if it has more rows than that.
+    :param table: Table to write.
+    :param name: Name of parquet data source without file extension.
+    :param codec: Parquet compression codec.
+    :param level: Compression level, None if codec has no levels.
+    :param row_group_size: Rows per row group.
+    :param file_rows: Rows per file, never partitioned if None.
+    """
+    temp = temp_parts(name)
+    try:
+        file_rows = file_rows or max(table.num_rows, 1)
+        for part, start in enumerate(range(0, max(table.num_rows, 1), file_rows)):
+            write_table(table.slice(start, file_rows), part_path(temp, part), compression=codec,
+                        compression_level=level, row_group_size=row_group_size)
+        publish_parts(temp, name)
+    finally:
+        if Path(temp).exists():
+            rmtree(temp)
+
+
+def remove_data(name:str):
+    """
+    Delete a saved parquet data source, its cache and column stats.
+    :param name: Name of parquet data source without file extension.
+    """
+    from resources.modules.stats import remove_stats
+    path = data_path(name)
+    if path.is_dir():
+        rmtree(path)
+    elif path.exists():
+        remove(path)
+    remove_cache(name)
+    remove_stats(name)
+
+
+def parquet_version(name:str) -> bytes:
+    """
+    Identify the current write of a saved parquet data source by its modified time and size,
+     the latest time and total size of its files if partitioned.
+    :param name: Name of parquet data source without file extension.
+    :return: Version stamp.
+    """
+    stats = [file.stat() for file in data_files(name)]
+    if not stats:
+        raise FileNotFoundError(str(data_path(name)))
+    return ('%s:%s' % (max(stat.st_mtime_ns for stat in stats), sum(stat.st_size for stat in stats))).encode()
+
+
+def source_schema(name:str) -> Schema:
+    """
+    Arrow schema of a saved parquet data source, read from its first file.
+    :param name: Name of parquet data source without file extension.
+    :return: Schema.
+    """
+    return read_schema(data_files(name)[0])
+
+
+def source_rows(name:str) -> int:
+    """
+    Number of rows in a saved parquet data source, from its file footers.
+    :param name: Name of parquet data source without file extension.
+    :return: Row count.
+    """
+    return sum(read_metadata(file).num_rows for file in data_files(name))
+
+
+def scan_data(name:str, columns:list[str]=None, filters:list=None, limit:int=None) -> Table:
+    """
+    Read the rows of a saved parquet data source that match filters, up to a row limit.
+    Filters are pushed into the scan,
+     row groups whose statistics show no matching rows are skipped without being read,
+     and the scan stops once the row limit is reached.
+    :param name: Name of parquet data source without file extension.
+    :param columns: Column names to read, all columns if None.
+    :param filters: Filters as (column, op, value) tuples, all of which must match,
+                    or a list of such lists of which any must match.
+    :param limit: Maximum rows read, all matching rows if None.
+    :return: Table.
+    """
+    scanner = dataset(str(data_path(name)), format='parquet').scanner(
+        columns=list(columns) if columns is not None else None,
+        filter=filters_to_expression(filters) if filters else None)
+    return scanner.head(limit) if limit is not None else scanner.to_table()
+
+
+def write_cache(table:Table, name:str):
+    """
+    Write an uncompressed Arrow IPC (Feather v2) copy of a parquet data source,
+     stamped with the version of the parquet it was made from.
+    Skipped if the existing cache is still mapped and can not be replaced,
+     it is then ignored on read as its stamp no longer matches.
+    :param table: Table written to the parquet data source.
+    :param name: Name of parquet data source without file extension.
+    """
+    write_cache_batches(name, table.schema, table.to_batches())
+
+
+def write_cache_from_parquet(name:str):
+    """
+    Write the Arrow IPC copy of a parquet data source one row group at a time,
+     for sources too large to hold in memory at once.
+    :param name: Name of parquet data source without file extension.
+    """
+    write_cache_batches(name, source_schema(name), parquet_row_groups(name))
+
+
+def parquet_row_groups(name:str):
+    """
+    Read a saved parquet data source back a row group at a time,
+     closing each file once read so the source can be replaced.
+    :param name: Name of parquet data source without file extension.
+    :return: Generator of tables.
+    """
+    for file in data_files(name):
+        with open(file, 'rb') as f:
+            source = ParquetFile(f)
+            for i in range(source.num_row_groups):
+                yield source.read_row_group(i)
+
+
+def write_cache_batches(name:str, table_schema:Schema, batches):
+    """
+    Write record batches or tables to the Arrow IPC copy of a parquet data source.
+    :param name: Name of parquet data source without file extension.
+    :param table_schema: Schema of the parquet data source.
+    :param batches: Iterable of record batches or tables.
+    """
+    makedirs('saved/cache', exist_ok=True)
+    meta = dict(table_schema.metadata or {})
+    meta[b'pqt_version'] = parquet_version(name)
+    temp = 'saved/cache/%s.arrow.tmp' % name
+    try:
+        with ipc.new_file(temp, table_schema.with_metadata(meta)) as writer:
+            for batch in batches:
+                writer.write(batch)
+        replace(temp, 'saved/cache/%s.arrow' % name)
+    except OSError:
+        if Path(temp).exists():
+            remove(temp)
+
+
+def read_cache(name:str, columns:list[str]=None) -> Union[Table, None]:
+    """
+    Open the Arrow IPC copy of a parquet data source with memory mapping,
+     if it matches the current version of the parquet.
+    Loaded columns share the OS page cache instead of holding private copies.
+    :param name: Name of parquet data source without file extension.
+    :param columns: Column names to select, all columns if None.
+    :return: Table, or None if there is no valid cache.
+    """
+    path = Path('saved/cache/%s.arrow' % name)
+    if not path.exists() or not data_path(name).exists():
+        return None
+    try:
+        reader = ipc.open_file(memory_map(str(path), 'r'))
+        if (reader.schema.metadata or {}).get(b'pqt_version') != parquet_version(name):
+            return None
+        table = reader.read_all()
+    except (OSError, ArrowInvalid):
+        return None
+    return table.select(list(columns)) if columns is not None else table
+
+
+def remove_cache(name:str):
+    """
+    Delete the Arrow IPC copy of a parquet data source, if there is one.
+    :param name: Name of parquet data source without file extension.
+    """
+    try:
+        remove('saved/cache/%s.arrow' % name)
+    except OSError:
+        pass
+
+
+def column_shapes(table_schema:Schema) -> dict[str, tuple[int, ...]]:
+    """
+    Shapes of the multidimensional columns of a saved parquet data source.
+    Read from the metadata of each field,
+     or from the list of shapes held by the schema in older saves.
+    :param table_schema: Parquet data source schema.
+    :return: Column names with their shape, empty if data is flat.
+    """
+    shapes = {column.name: tuple(loads(column.metadata[b'shape'])) for column in table_schema
+              if column.metadata and b'shape' in column.metadata}
+    if not shapes and table_schema.metadata and table_schema.metadata.get(b'shape'):
+        shapes = dict(zip(table_schema.names, literal_eval(table_schema.metadata[b'shape'].decode())))
+    return shapes
+
+
+def dictionary_columns(table:Table) -> Table:
+    """
+    Dictionary encode string columns marked to load as categorical,
+     that were saved as plain strings by a streamed ingest.
+    :param table: Table read from a parquet data source or its cache.
+    :return: Table with marked columns dictionary encoded.
+    """
+    for i, column in enumerate(table.schema):
+        if column.metadata and column.metadata.get(b'dictionary') and not types.is_dictionary(column.type):
+            encoded = table.column(i).dictionary_encode()
+            table = table.set_column(i, column.with_type(encoded.type), encoded)
+    return table
+
+
+def column_array(column:ChunkedArray) -> np.ndarray:
+    """
+    Numpy array of a parquet column, a view over its Arrow buffer,
+     only copied if the column was read in several chunks.
+    :param column: Column of a parquet table.
+    :return: Flat Numpy array.
+    """
+    if column.num_chunks == 1:
+        return column.chunk(0).to_numpy(zero_copy_only=False)
+    return column.to_numpy()
+
+
+def table_frame(table:Table) -> DataFrame:
+    """
+    Dataframe of a table read from a data source.
+    Columns are Arrow-backed (ArrowDtype) when spec arrow_frames is set,
+     keeping strings and nullable columns in their Arrow buffers without converting or copying them,
+     otherwise they are converted to Numpy dtypes.
+    Columns marked to load as categorical are categorical either way.
+    :param table: Table read from a parquet data source or its cache.
+    :return: Pandas Dataframe.
+    """
+    from resources.modules.spec import spec_service
+    table = dictionary_columns(table)
+    if spec_service().spec.get('arrow_frames', False):
+        return table.to_pandas(types_mapper=lambda arrow_type: None if types.is_dictionary(arrow_type)
+                               else ArrowDtype(arrow_type))
+    return table.to_pandas()
+
+
+def numpy_column(column:Series) -> Series:
+    """
+    Column with a Numpy dtype, for plotting.
+    Arrow-backed numbers with missing values become floats with NaN,
+     strings and other values become objects.
+    :param column: Pandas Series.
+    :return: Series, unchanged if it is not Arrow-backed.
+    """
+    if not isinstance(column.dtype, ArrowDtype):
+        return column
+    arrow_type = column.dtype.pyarrow_dtype
+    if types.is_integer(arrow_type) or types.is_floating(arrow_type):
+        return column.astype('float64' if column.hasnans else column.dtype.numpy_dtype)
+    if types.is_temporal(arrow_type) or types.is_boolean(arrow_type) and not column.hasnans:
+        return column.astype(column.dtype.numpy_dtype)
+    return column.astype(object)
+
+
+class LazySource:
+    def __init__(self, name:str):
+        """
+        Reference to a flat parquet data source, file or partitioned dataset,
+         only reading the columns requested from it.
+        Holds no open file, so the source can be rewritten while referenced.
+        :param name: Name of parquet data source without file extension.
+        """
+        from resources.modules.catalog import catalog
+        entry = catalog().get(name)
+        self.name = name
+        self.path = str(data_path(name))
+        self.columns:list[str] = entry.columns if entry else source_schema(name).names
+        self.rows:int = entry.rows if entry else source_rows(name)
+        self.stats:dict[str, dict] = entry.stats if entry else {}
+
+    def column_stat(self, column:str, stat:str) -> Union[int, float, None]:
+        """
+        Stat of a numeric column saved when the data source was written.
+        :param column: Column name.
+        :param stat: Stat name; min, max, nulls or distinct.
+        :return: Stat value, None if not saved or not a number.
+        """
+        value = self.stats.get(column, {}).get(stat)
+        return value if isinstance(value, (int, float)) and not isinstance(value, bool) else None
+
+    def load(self, columns:list[str], filters:list=None, limit:int=None) -> DataFrame:
+        """
+        Read only the given columns of the data source,
+         from its memory mapped cache when valid.
+        Filtered or limited reads scan the parquet,
+         only reading the row groups they need.
+        Low cardinality string columns load as categorical.
+        :param columns: Column names to read.
+        :param filters: Filters pushed down into the scan, see scan_data.
+        :param limit: Maximum rows read.
+        :return: Pandas Dataframe of the given columns.
+        """
+        if filters or limit is not None:
+            return table_frame(scan_data(self.name, columns, filters, limit))
+        table = read_cache(self.name, columns)
+        if table is None:
+            table = read_table(self.path, columns=list(columns))
+        return table_frame(table)
+
+
+def lazy_source(name:str) -> Union[LazySource, None]:
+    """
+    Create a reference to a saved parquet data source,
+     if it exists and is not multidimensional.
+    :param name: Name of parquet data source without file extension.
+    :return: LazySource, or None if columns can not be loaded separately.
+    """
+    from resources.modules.catalog import catalog
+    entry = catalog().get(name)
+    if entry is None or entry.shapes:
+        return None
+    return LazySource(name)
+
+
+def load_data(name:str, columns:list[str]=None, filters:list=None,
+              limit:int=None) -> Union[DataFrame, dict[np.ndarray]]:
+    """
+    Read a saved parquet data source,
+     from its memory mapped Arrow IPC cache when valid.
+    Filters and row limits only apply to flat data sources,
+     and are pushed down into the parquet scan.
+    :param name: Name of parquet data source without file extension.
+    :param columns: Column names to read from a flat data source, all columns if None.
+    :param filters: Filters as (column, op, value) tuples, see scan_data.
+    :param limit: Maximum rows read.
+    :return: Pandas Dataframe or dict of Numpy arrays.
+    """
+    if columns is not None or filters or limit is not None:
+        source = lazy_source(name)
+        if source is not None:
+            columns = source.columns if columns is None else columns
+            return source.load([col for col in dict.fromkeys(columns) if col in source.columns], filters, limit)
+    table = read_cache(name)
+    if table is None:
+        table = read_table(str(data_path(name)))
+    shapes = column_shapes(table.schema)
+    if shapes:
+        return {col: column_array(table.column(col)).reshape(shapes.get(col, -1)) for col in table.column_names}
+    return table_frame(table)
+
+
+def data_reference(name:str) -> Union[dict, None]:
+    """
+    Reference to a saved parquet data source, stored in place of its data.
+    :param name: Name of parquet data source without file extension.
+    :return: Name and version of the data source, None if it is not saved.
+    """
+    if not name or not data_files(name):
+        return None
+    return {'name': name, 'version': parquet_version(name).decode()}
 
 
 class Data:
-    def __init__(self, base_data):
+    def __init__(self, base_data, source:LazySource=None):
         """
         Manage plot map data,
          of a Pandas Dataframe,
          or dictionary of Numpy arrays,
          from a saved parquet file.
+        :param base_data: Plot map data.
+        :param source: Data source of plot map data, when only some of its columns are loaded.
         """
         from resources.modules.utility import save_data_as_parquet
         self.save_pqt = save_data_as_parquet
         self.pqt_sources:list[str] = self.update_dict()
-        self.formated_data:DataFrame = base_data
+        self.pending:Union[LazySource, None] = None
+        self.pending_loaded:Union[LazySource, None] = None
+        self._formated_data:DataFrame = base_data
+        self._loaded_data:DataFrame = deepcopy(base_data) if source is None else None
+        if source is not None:
+            self.defer_formated(source)
+
+    @property
+    def formated_data(self) -> DataFrame:
+        """
+        Formated data, loaded in full from its data source the first time it is used.
+        :return: Pandas Dataframe, or None.
+        """
+        self.load_pending()
+        return self._formated_data
+
+    @formated_data.setter
+    def formated_data(self, data:DataFrame):
+        self.pending = None
+        self._formated_data = data
+
+    @property
+    def loaded_data(self) -> DataFrame:
+        """
+        Unmodified copy of the data formated data was created from,
+         loaded in full from its data source the first time it is used.
+        :return: Pandas Dataframe, or None.
+        """
+        self.load_pending_loaded()
+        return self._loaded_data
+
+    @loaded_data.setter
+    def loaded_data(self, data:DataFrame):
+        self.pending_loaded = None
+        self._loaded_data = data
+
+    def defer_formated(self, source:LazySource):
+        """
+        Set formated data, and the data it is created from, to be loaded from a data source,
+         only once they are actually used.
+        :param source: Data source for formated data.
+        """
+        self.pending = self.pending_loaded = source
+
+    def load_pending_loaded(self):
+        """
+        Load every column of a deferred data source into loaded data.
+        """
+        if self.pending_loaded is not None:
+            source, self.pending_loaded = self.pending_loaded, None
+            self._loaded_data = source.load(source.columns)
+
+    def load_pending(self):
+        """
+        Load every column of a deferred data source into formated data.
+        """
+        if self.pending is not None:
+            self.pending = None
+            self.load_pending_loaded()
+            self._formated_data = deepcopy(self._loaded_data)
+
+    def has_formated(self) -> bool:
+        """
+        Check for formated data, without loading a deferred data source.
+        :return: True if formated data is set or deferred.
+        """
+        return self.pending is not None or self._formated_data is not None
+
+    def formated_saved(self) -> bool:
+        """
+        Check if formated data is unchanged from the data it was created from.
+        Row counts are compared first, so a limited data source is not read in full to compare.
+        :return: True if unchanged.
+        """
+        if self.pending is not None:
+            return True
+        if self.pending_loaded is not None and isinstance(self._formated_data, DataFrame) \
+                and len(self._formated_data) != self.pending_loaded.rows:
+            return False
+        return isinstance(self._formated_data, DataFrame) and self._formated_data.equals(self.loaded_data)
+
+    def formated_rows(self) -> int:
+        """
+        Number of rows in formated data, without loading a deferred data source.
+        :return: Row count, 0 if formated data is not a Dataframe.
+        """
+        if self.pending is not None:
+            return self.pending.rows
+        if isinstance(self._formated_data, DataFrame):
+            return len(self._formated_data)
+        return 0
 
     def update_dict(self) -> list[str]:
         """
-        Load the names of all saved parquet data files into a reference dictionary.
+        Load the names of all saved parquet data files into a reference dictionary,
+         from the dataset catalog rather than listing the data folder.
         :return: List of parquet sources available.
         """
-        self.pqt_sources = [pqt[:-4] for pqt in listdir('saved/data')]
+        from resources.modules.catalog import catalog
+        self.pqt_sources = catalog().names()
         self.pqt_sources.insert(0, '')
         return self.pqt_sources
 
-    def get_df(self, pqt_id:int) -> Tuple[Union[DataFrame, dict[np.ndarray]], str]:
+    def get_df(self, pqt_id:int, columns:list[str]=None, filters:list=None,
+               limit:int=None) -> Tuple[Union[DataFrame, dict[np.ndarray]], str]:
         """
         Create plot map data,
          of a Pandas Dataframe,
          or dictionary of Numpy arrays,
          from module dict.
+        If columns are given, only those columns of a flat data source are read,
+         any others can be loaded later through a LazySource.
+        Reads the memory mapped Arrow IPC cache of the data source when it is valid.
+        Multidimensional sources return read only Numpy views over the loaded buffers.
+        Filters and row limits are pushed down into the scan of a flat data source,
+         so only the row groups they need are read,
+         e.g. filters=[('year', '>=', 2020)], limit=10000.
         :param pqt_id: Index reference of parquet data source name.
+        :param columns: Column names to read, all columns if None.
+        :param filters: Filters as (column, op, value) tuples, all of which must match.
+        :param limit: Maximum rows read.
         :return: Data: Pandas Dataframe or dict of Numpy arrays.
                  Name: Name of parquet data source without file extension.
         """
         name = self.pqt_sources[pqt_id]
-        table = read_table('saved/data/%s.pqt' % name)
-        meta = {key.decode(): value.decode() for key, value in table.schema.metadata.items()}
-        np_shape = literal_eval(meta['shape'])
-        if np_shape:
-            np_dict = table.to_pydict()
-            i = 0
-            print('shape in get df in data: %s' % np_shape)
-            for col in np_dict:
-                np_dict[col] = array(np_dict[col]).reshape(np_shape[i])
-                i += 1
-            return np_dict, name
-        else:
-            df = table.to_pandas()
-            return df, name
+        return load_data(name, columns, filters, limit), name
 
     def merge_dfs(self, df1:DataFrame, df2:DataFrame, on_column:str) -> Union[DataFrame, None]:
         """
@@ -67,9 +606,11 @@ class Data:
         :param on_column: Common column between both data objects to be merged on.
         :return: If not failed, new Pandas Dataframe that has been merged
         """
+        from resources.modules.catalog import catalog
         if isinstance(df1, DataFrame) and isinstance(df2, DataFrame):
             df = df1.merge(df2, on=on_column, how='outer')
             self.save_pqt(df, 'modified_data')
+            catalog().refresh_entry('modified_data')
             return df
         return None
 
@@ -77,11 +618,17 @@ class Data:
         """
         Limit formated data to a specific size.
         Can be applied to a specific column or to the whole Dataframe.
+        The whole Dataframe of a deferred data source is limited in its scan,
+         only reading the rows kept.
         :param column: If given, column to limit.
         :param limit: Length to limit to.
         """
         if column in ['All Columns', '']:
-            self.formated_data = self.formated_data.copy().head(limit)
+            if self.pending is not None:
+                source, self.pending = self.pending, None
+                self._formated_data = source.load(source.columns, limit=limit)
+            else:
+                self.formated_data = self.formated_data.copy().head(limit)
         else:
             self.formated_data[column] = self.formated_data[column].copy().head(limit)
 
@@ -91,5 +638,7 @@ class Data:
         :param name: Name for data source to be saved as.
         :return: Copy of formated data.
         """
+        from resources.modules.catalog import catalog
         self.save_pqt(self.formated_data, name)
+        catalog().refresh_entry(name)
         return deepcopy(self.formated_data)
\ No newline at end of file
@@ -0,0 +1,65 @@
+import numpy as np
+
+"""
+Scatter plots with more points than this are drawn as a density image,
+ unless spec density_points sets another threshold.
+"""
+DENSITY_POINTS = 500_000
+
+"""
+Aggregates a density image can show for each pixel;
+ the number of points, or the mean or max of their z values.
+"""
+DENSITY_AGGREGATES = ['count', 'mean', 'max']
+
+
+def density_grid(x, y, z, aggregate:str, width:int, height:int) -> tuple[np.ndarray, tuple[float, ...]]:
+    """
+    Bin points into a grid of cells, aggregating the points in each cell.
+    Points with a missing coordinate, or a missing z value when aggregating z, are dropped.
+    :param x: X coordinate data.
+    :param y: Y coordinate data.
+    :param z: Z coordinate data, unused when counting.
+    :param aggregate: Aggregate of each cell, one of DENSITY_AGGREGATES.
+    :param width: Cells across.
+    :param height: Cells down.
+    :return: Grid: Aggregates of shape (height, width), NaN where a cell has no points.
+             Extent: Left, right, bottom and top of the grid in data coordinates.
+    """
+    width, height = max(int(width), 1), max(int(height), 1)
+    x, y = np.asarray(x, dtype=float).ravel(), np.asarray(y, dtype=float).ravel()
+    valid = np.isfinite(x) & np.isfinite(y)
+    if aggregate != 'count':
+        z = np.asarray(z, dtype=float).ravel()
+        valid &= np.isfinite(z)
+        z = z[valid]
+    x, y = x[valid], y[valid]
+    if len(x) == 0:
+        return np.full((height, width), np.nan), (0, 1, 0, 1)
+    extent = (x.min(), x.max(), y.min(), y.max())
+    cells = grid_cells(y, extent[2], extent[3], height) * width + grid_cells(x, extent[0], extent[1], width)
+    count = np.bincount(cells, minlength=width * height)
+    if aggregate == 'count':
+        grid = count.astype(float)
+    elif aggregate == 'mean':
+        grid = np.bincount(cells, weights=z, minlength=width * height) / np.maximum(count, 1)
+    else:
+        grid = np.full(width * height, -np.inf)
+        np.maximum.at(grid, cells, z)
+    grid[count == 0] = np.nan
+    return grid.reshape(height, width), extent
+
+
+def grid_cells(values:np.ndarray, low:float, high:float, cells:int) -> np.ndarray:
+    """
+    Cell index of each value along one side of a grid.
+    :param values: Coordinate values.
+    :param low: Lowest value, at the start of the first cell.
+    :param high: Highest value, at the end of the last cell.
+    :param cells: Cells along the side.
+    :return: Cell indexes.
+    """
+    if high <= low:
+        return np.zeros(len(values), dtype=np.int64)
+    return np.minimum(((values - low) * (cells / (high - low))).astype(np.int64), cells - 1)
+
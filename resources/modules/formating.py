@@ -18,7 +18,6 @@ class Formater(QWidget):
         super().__init__(parent=settings)
         # VARS
         self.settings = settings
-        self.last_formated_data = deepcopy(self.settings.data.formated_data)
 
         # SET FORMATED DATA SOURCE NAME
         formated_df_name_label = QLabel('Formated Data Title:')
@@ -39,7 +38,7 @@ class Formater(QWidget):
         self.range_selector = QSlider()
         self.range_selector.setOrientation(Qt.Orientation.Horizontal)
         self.range_selector.valueChanged.connect(self.format_range)
-        if self.settings.data.formated_data is not None:
+        if self.settings.data.formated_rows():
             QTimer.singleShot(1000, self.update_range_selector)
         # SET RANGE BUTTON
         self.set_range_button = QPushButton('Apply %s Limit to All Columns' % (self.range_selector.value()))
@@ -89,13 +88,26 @@ class Formater(QWidget):
         layout.addWidget(QLabel('The Other Thing'), 7, 1)
         self.setLayout(layout)
 
+    @property
+    def last_formated_data(self) -> DataFrame:
+        """
+        Formated data as it was last loaded or saved,
+         held by Data so it is only read once it is needed.
+        :return: Pandas Dataframe, or None.
+        """
+        return self.settings.data.loaded_data
+
+    @last_formated_data.setter
+    def last_formated_data(self, data:DataFrame):
+        self.settings.data.loaded_data = data
+
     def check_save_state(self):
         """
         Update save formated data button to indicate
          if formated data has be changed or saved.
         """
-        if self.settings.data.formated_data is not None:
-            if self.settings.data.formated_data.equals(self.last_formated_data):
+        if self.settings.data.has_formated():
+            if self.settings.data.formated_saved():
                 self.settings.save_new_format_button.setText('Formated Data Saved')
             else:
                 self.settings.save_new_format_button.setText('Formated Data Changed: SAVE')
@@ -110,23 +122,28 @@ class Formater(QWidget):
 
     def update_range_selector(self):
         """
-        Set range selector range based on size of formated data.
+        Set range selector range based on size of formated data,
+         without loading formated data if it is still deferred.
         """
-        if isinstance(self.settings.data.formated_data, DataFrame):
-            index = self.settings.data.formated_data.index
-            fdf_min = index[0]
-            self.fdf_max = index[-1] + 1
-            self.range_selector.setRange(fdf_min, self.fdf_max)
+        rows = self.settings.data.formated_rows()
+        if rows:
+            self.fdf_max = rows
+            self.range_selector.setRange(0, self.fdf_max)
             self.range_selector.setValue(self.fdf_max)
 
     def set_formated_data(self):
         """
         Establish valid formated data from plot map data,
          if data is a Pandas Dataframe.
+        If plot map data has a data source,
+         formated data is only read from it once it is used.
         """
         if self.settings.plot_map['data'] is not None and isinstance(self.settings.plot_map['data'], DataFrame):
-            self.settings.data.formated_data = deepcopy(self.settings.plot_map['data'])
-            self.last_formated_data = deepcopy(self.settings.plot_map['data'])
+            if self.settings.plot_map_obj.source is not None:
+                self.settings.data.defer_formated(self.settings.plot_map_obj.source)
+            else:
+                self.settings.data.formated_data = deepcopy(self.settings.plot_map['data'])
+                self.last_formated_data = deepcopy(self.settings.plot_map['data'])
             self.formated_data_name.setText(self.settings.plot_map['data_name'])
             self.update_range_selector()
         else:
@@ -138,7 +155,7 @@ class Formater(QWidget):
         """
         Applies defined range from range selector to formated data.
         """
-        if self.settings.data.formated_data is None:
+        if not self.settings.data.has_formated():
             self.alert_invalid()
         else:
             if self.format_coord_selector.currentIndex() > 0:
@@ -228,7 +245,7 @@ class Formater(QWidget):
             if self.format_coord_selector.currentIndex() > 0:
                 self.df_merge_button.setText("Merging Data Sources...")
                 df2, name = self.settings.data.get_df(self.merge_index)
-                if [True for col2 in df2.columns for col1 in self.settings.plot_map['data'].columns if col1 == col2]:
+                if [True for col2 in df2.columns for col1 in self.settings.plot_map_obj.column_names() if col1 == col2]:
                     check = QMessageBox.information(self, "Merge Data Sources",
                                                     "Begin Merging on Column %s\n With %s and %s\n\n"
                                                     "This Can be an Increasingly Long Process.\n"
@@ -263,7 +280,7 @@ class Formater(QWidget):
         :param df2: secondary Dataframe.
         """
         on_column = self.format_coord_selector.currentText()
-        merged_data = self.settings.data.merge_dfs(self.settings.plot_map['data'], df2, on_column)
+        merged_data = self.settings.data.merge_dfs(self.last_formated_data, df2, on_column)
         if merged_data is not None:
             self.settings.data.formated_data = merged_data
             self.df_merge_button.setText("Data Merged Successfully")
@@ -0,0 +1,339 @@
+from io import BytesIO
+from json import loads
+from os import cpu_count
+from shutil import rmtree
+from pathlib import Path
+from re import sub
+from typing import Union
+from queue import Queue, Full
+from threading import Thread, Event
+
+from pandas import read_csv, read_json, read_excel, json_normalize
+from pyarrow import ArrowInvalid, ArrowTypeError, Schema, RecordBatch, Table, nulls, types, unify_schemas
+from pyarrow.compute import count_distinct
+from pyarrow.csv import open_csv, ReadOptions, ConvertOptions
+from pyarrow.json import read_json as read_json_table, ParseOptions as JsonParseOptions
+from pyarrow.parquet import ParquetWriter
+
+from resources.modules.data import (write_cache_from_parquet, temp_parts, part_path, publish_parts,
+                                    ROW_GROUP_ROWS, DATASET_FILE_ROWS)
+from resources.modules.stats import TableStats, write_stats
+from resources.modules.utility import save_data_as_parquet, get_compression, low_cardinality
+
+"""
+Bytes of csv or newline delimited JSON parsed per record batch when streaming,
+ bounding memory used while converting a source.
+"""
+CSV_BLOCK_SIZE = 1 << 24
+
+"""
+Separates a workbook name from a sheet name in the data source of each later sheet.
+"""
+SHEET_SEPARATOR = ' - '
+
+"""
+Record batches held between reading and writing a streamed source.
+"""
+PIPELINE_DEPTH = 2
+
+
+def ingest_workers(spec:dict) -> int:
+    """
+    Number of worker processes to update primary sources with.
+    Set by ingest_workers in the spec, 0 uses every core, 1 updates sources one at a time.
+    :param spec: Application spec dictionary.
+    :return: Worker count.
+    """
+    workers = int(spec.get('ingest_workers', 0))
+    return workers if workers > 0 else max(1, cpu_count() or 1)
+
+
+def ingest_source(source:str, spec:dict) -> list[str]:
+    """
+    Converts a saved external primary source in the sources folder to parquet.
+    Defined at module level so it can run in a worker process.
+    Csv and newline delimited JSON sources are streamed,
+     falling back to reading them whole if their column types change part way through.
+    Excel workbooks are read once, every sheet saved as its own data source.
+    :param source: Primary source file name.
+    :param spec: Application spec dictionary.
+    :return: Names of the parquet data sources written, empty if not in a csv, JSON, NDJSON or Excel format.
+    """
+    source_path = 'saved/sources/' + source
+    source_name = source[:source.rfind('.')]
+    if source[source.rfind('.'):][:4] == '.csv':
+        try:
+            stream_csv(source_path, source_name, spec['sources'][source][1], spec)
+            return [source_name]
+        except ArrowInvalid:
+            pass
+        df = read_csv(source_path, na_filter=True, encoding=spec['sources'][source][1])
+    elif source[source.rfind('.'):][:5] == '.json' or source[source.rfind('.'):] == '.ndjson':
+        lines = is_ndjson(source_path)
+        if lines:
+            try:
+                stream_ndjson(source_path, source_name, spec['sources'][source][1], spec)
+                return [source_name]
+            except (ArrowInvalid, ArrowTypeError):
+                pass
+        df = read_json(source_path, encoding=spec['sources'][source][1], lines=lines)
+        if lines and spec.get('json_flatten', True):
+            df = json_normalize(df.to_dict('records'))
+    elif source[source.rfind('.'):][:4] == '.xls':
+        sheets = read_excel(source_path, sheet_name=None, na_values='')
+        names = sheet_names(source_name, list(sheets))
+        for sheet, df in sheets.items():
+            save_data_as_parquet(df, names[sheet], spec, source_name)
+        return list(names.values())
+    else:
+        return []
+    save_data_as_parquet(df, source_name, spec)
+    return [source_name]
+
+
+def sheet_names(source_name:str, sheets:list[str]) -> dict[str, str]:
+    """
+    Names the parquet data source of each sheet of an Excel workbook.
+    The first sheet keeps the workbook name, so existing plot maps still find it,
+     later sheets are suffixed with their sheet name.
+    :param source_name: Primary source data name.
+    :param sheets: Sheet names of the workbook, in order.
+    :return: Sheet names with their data source name.
+    """
+    names = {}
+    for i, sheet in enumerate(sheets):
+        names[sheet] = source_name if i == 0 else '%s%s%s' % (source_name, SHEET_SEPARATOR,
+                                                               sub(r'[<>:"/\\|?*]', '_', str(sheet)))
+    return names
+
+
+def read_batches(reader, batches:Queue, stop:Event):
+    """
+    Reads record batches into a bounded queue, ending with None,
+     or with the error that stopped reading.
+    Runs in its own thread, so parsing overlaps with writing.
+    :param reader: Arrow record batch reader.
+    :param batches: Queue to pass batches to the writer.
+    :param stop: Set by the writer if it stops early.
+    """
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                batches.put(item, timeout=.1)
+                return True
+            except Full:
+                pass
+        return False
+    try:
+        for batch in reader:
+            if not put(batch):
+                return
+    except Exception as e:
+        put(e)
+        return
+    put(None)
+
+
+def stream_csv(source_path:str, source_name:str, encoding:str, spec:dict):
+    """
+    Converts a csv source to parquet in record batches.
+    Column types are taken from the whole first block, not from a single value.
+    :param source_path: Path to csv source.
+    :param source_name: Primary source data name.
+    :param encoding: Text encoding of csv source.
+    :param spec: Application spec dictionary.
+    """
+    reader = open_csv(source_path,
+                      read_options=ReadOptions(encoding=encoding or 'utf8',
+                                               block_size=int(spec.get('csv_block_size', CSV_BLOCK_SIZE))),
+                      convert_options=ConvertOptions(strings_can_be_null=True))
+    write_stream(reader, reader.schema, source_name, spec)
+
+
+def stream_ndjson(source_path:str, source_name:str, encoding:str, spec:dict):
+    """
+    Converts a newline delimited JSON source to parquet in record batches.
+    Nested objects are flattened into dotted columns, unless spec json_flatten is False.
+    The source is read twice, once to find the columns and types of every block,
+     then again to write each block in those types.
+    :param source_path: Path to JSON source.
+    :param source_name: Primary source data name.
+    :param encoding: Text encoding of JSON source.
+    :param spec: Application spec dictionary.
+    """
+    block_size, flatten = int(spec.get('csv_block_size', CSV_BLOCK_SIZE)), spec.get('json_flatten', True)
+    table_schema = ndjson_schema(source_path, encoding, block_size, flatten)
+    write_stream(ndjson_batches(source_path, encoding, block_size, flatten, table_schema),
+                 table_schema, source_name, spec)
+
+
+def write_stream(reader, table_schema:Union[Schema, None], source_name:str, spec:dict):
+    """
+    Writes record batches to parquet as they are read,
+     a row group for each batch.
+    Reading runs in its own thread, overlapping with writing,
+     peak memory is bounded by the block size and pipeline depth, not by the file size.
+    Sources over dataset_file_rows rows are split into a partitioned dataset,
+     written in row groups of at most ROW_GROUP_ROWS so filtered reads can skip them.
+    Sources with a sort_by column in the spec are sorted by it within each file,
+     the batches of a file held until it is complete, so memory is bounded by dataset_file_rows instead.
+    The parquet is written to a temporary directory and only replaces existing data once complete.
+    Column stats are collected from each batch as it is written.
+    :param reader: Iterable of record batches.
+    :param table_schema: Schema of the batches, taken from the first batch if None.
+    :param source_name: Primary source data name.
+    :param spec: Application spec dictionary.
+    """
+    codec, level = get_compression(spec, source_name)
+    file_rows = int(spec.get('dataset_file_rows', DATASET_FILE_ROWS))
+    batches = Queue(maxsize=PIPELINE_DEPTH)
+    stop = Event()
+    Thread(target=read_batches, args=(reader, batches, stop), daemon=True).start()
+    temp = temp_parts(source_name)
+    def next_batch() -> Union[RecordBatch, None]:
+        batch = batches.get()
+        if isinstance(batch, Exception):
+            raise batch
+        return batch
+    writer = None
+    held = []
+    def write_held():
+        if held:
+            table = Table.from_batches(held).sort_by(sort_column)
+            writer.write_table(table, row_group_size=ROW_GROUP_ROWS)
+            stats.update(table)
+            held.clear()
+    try:
+        batch = next_batch()
+        if table_schema is None:
+            if batch is None:
+                raise ArrowInvalid('Source %s has no rows' % source_name)
+            table_schema = batch.schema
+        table_schema = dictionary_schema(table_schema, batch)
+        sort_column = spec.get('sort_by', {}).get(source_name)
+        if sort_column not in table_schema.names:
+            sort_column = None
+        stats = TableStats(table_schema)
+        part = rows = 0
+        writer = ParquetWriter(part_path(temp, part), table_schema, compression=codec, compression_level=level)
+        while batch is not None:
+            if rows >= file_rows:
+                write_held()
+                writer.close()
+                part, rows = part + 1, 0
+                writer = ParquetWriter(part_path(temp, part), table_schema,
+                                       compression=codec, compression_level=level)
+            if sort_column:
+                held.append(batch)
+            else:
+                writer.write_batch(batch, row_group_size=ROW_GROUP_ROWS)
+                stats.update(batch)
+            rows += batch.num_rows
+            batch = next_batch()
+        write_held()
+        writer.close()
+        writer = None
+        publish_parts(temp, source_name)
+        write_stats(source_name, stats)
+    finally:
+        stop.set()
+        if writer is not None:
+            writer.close()
+        if Path(temp).exists():
+            rmtree(temp)
+    if spec.get('ipc_cache', True):
+        write_cache_from_parquet(source_name)
+
+
+def ndjson_blocks(source_path:str, encoding:str, block_size:int, flatten:bool):
+    """
+    Parses a newline delimited JSON file a block of whole lines at a time,
+     the columns and types of each block inferred from that block alone.
+    :param source_path: Path to JSON source.
+    :param encoding: Text encoding of JSON source, transcoded to UTF-8 if different.
+    :param block_size: Approximate bytes parsed per block.
+    :param flatten: Flatten nested objects into dotted columns.
+    :return: Generator of Arrow tables.
+    """
+    transcode = (encoding or 'utf-8').lower().replace('_', '-') not in ('utf-8', 'utf8', 'ascii')
+    with open(source_path, 'rb') as file:
+        while block := file.read(block_size):
+            block += file.readline()
+            if transcode:
+                block = block.decode(encoding).encode()
+            table = read_json_table(BytesIO(block))
+            while flatten and any(types.is_struct(column.type) for column in table.schema):
+                table = table.flatten()
+            yield table
+
+
+def ndjson_schema(source_path:str, encoding:str, block_size:int, flatten:bool) -> Union[Schema, None]:
+    """
+    Columns and types of a whole newline delimited JSON file,
+     unified from the schema of every block.
+    Fields first appearing in later blocks are added,
+     null columns take the type of later values and integer columns holding decimals become floats.
+    :param source_path: Path to JSON source.
+    :param encoding: Text encoding of JSON source.
+    :param block_size: Approximate bytes parsed per block.
+    :param flatten: Flatten nested objects into dotted columns.
+    :return: Schema, None if the file has no rows.
+    """
+    schemas = [table.schema for table in ndjson_blocks(source_path, encoding, block_size, flatten)]
+    return unify_schemas(schemas, promote_options='permissive') if schemas else None
+
+
+def ndjson_batches(source_path:str, encoding:str, block_size:int, flatten:bool, table_schema:Schema):
+    """
+    Parses a newline delimited JSON file a block of whole lines at a time,
+     conforming each block to the schema of the whole file.
+    Columns missing from a block are filled with nulls.
+    :param source_path: Path to JSON source.
+    :param encoding: Text encoding of JSON source.
+    :param block_size: Approximate bytes parsed per block.
+    :param flatten: Flatten nested objects into dotted columns.
+    :param table_schema: Schema of the whole file, from ndjson_schema.
+    :return: Generator of record batches.
+    """
+    for table in ndjson_blocks(source_path, encoding, block_size, flatten):
+        columns = [table.column(column.name).cast(column.type) if column.name in table.column_names
+                   else nulls(table.num_rows, column.type) for column in table_schema]
+        yield from Table.from_arrays(columns, schema=table_schema).to_batches()
+
+
+def is_ndjson(source_path:str) -> bool:
+    """
+    Checks if a JSON source holds one object per line.
+    Files ending .ndjson or .jsonl always do,
+     .json files do if their first line is a whole object and more lines follow.
+    :param source_path: Path to JSON source.
+    :return: True if newline delimited.
+    """
+    if source_path[source_path.rfind('.'):] in ('.ndjson', '.jsonl'):
+        return True
+    with open(source_path, 'rb') as file:
+        first = file.readline().strip()
+        following = file.readline().strip()
+    try:
+        return bool(following) and isinstance(loads(first.decode(errors='replace').lstrip('\ufeff')), dict)
+    except ValueError:
+        return False
+
+
+def dictionary_schema(table_schema:Schema, batch:Union[RecordBatch, None]) -> Schema:
+    """
+    Marks low cardinality string columns of a streamed source to load as categorical,
+     judged from its first record batch.
+    Row groups of a streamed source are written as plain strings,
+     so their dictionaries never need to agree.
+    :param table_schema: Schema of the streamed source.
+    :param batch: First record batch, None if the source has no rows.
+    :return: Schema with dictionary field metadata on low cardinality string columns.
+    """
+    if batch is None or not batch.num_rows:
+        return table_schema
+    for i, column in enumerate(table_schema):
+        if types.is_string(column.type) or types.is_large_string(column.type):
+            if low_cardinality(count_distinct(batch.column(i)).as_py(), batch.num_rows):
+                table_schema = table_schema.set(i, column.with_metadata({'dictionary': '1'}))
+    return table_schema
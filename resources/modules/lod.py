@@ -0,0 +1,66 @@
+from typing import Union
+
+import numpy as np
+
+"""
+Rows kept per pixel column when decimating a line-style plot,
+ its first, last, lowest and highest rows.
+Plots with fewer rows than this per pixel column are drawn in full.
+"""
+LOD_ROWS_PER_PIXEL = 4
+
+
+def min_max_rows(positions:np.ndarray, values:np.ndarray, columns:int) -> np.ndarray:
+    """
+    Rows keeping the visual envelope of a line when drawn a given number of pixels wide.
+    Rows are binned into pixel columns by position,
+     the first, last, lowest and highest value of each column are kept.
+    Rows with a missing position or value are dropped.
+    :param positions: Horizontal position of each row.
+    :param values: Vertical value of each row.
+    :param columns: Pixel columns the line is drawn across.
+    :return: Sorted row positions kept.
+    """
+    valid = np.flatnonzero(np.isfinite(positions) & np.isfinite(values))
+    if len(valid) == 0:
+        return valid
+    positions, values = positions[valid], values[valid]
+    low, high = positions.min(), positions.max()
+    if high > low:
+        bins = ((positions - low) * ((columns - 1) / (high - low))).astype(np.int64)
+    else:
+        bins = np.zeros(len(positions), dtype=np.int64)
+    order = np.lexsort((values, bins))
+    ordered_bins = bins[order]
+    starts = np.flatnonzero(np.r_[True, ordered_bins[1:] != ordered_bins[:-1]])
+    ends = np.r_[starts[1:], len(order)] - 1
+    _, first = np.unique(bins, return_index=True)
+    _, last = np.unique(bins[::-1], return_index=True)
+    kept = np.unique(np.concatenate([order[starts], order[ends], first, len(bins) - 1 - last]))
+    return valid[kept]
+
+
+def lod_rows(x, y, columns:int) -> Union[np.ndarray, None]:
+    """
+    Rows to draw of a line-style plot at a pixel width,
+     if it has more rows than can be seen at that width.
+    Rows are positioned by x when it is numeric or temporal,
+     otherwise by their order.
+    :param x: X coordinate data, None if the plot has none.
+    :param y: Y coordinate data.
+    :param columns: Pixel width of the plot.
+    :return: Sorted row positions to draw, None to draw every row.
+    """
+    kind = getattr(y, 'dtype', None)
+    if kind is None or kind.kind not in 'biuf' or len(y) <= LOD_ROWS_PER_PIXEL * max(columns, 1):
+        return None
+    values = np.asarray(y, dtype=float)
+    x_kind = getattr(x, 'dtype', None)
+    if x_kind is not None and x_kind.kind in 'biuf':
+        positions = np.asarray(x, dtype=float)
+    elif x_kind is not None and x_kind.kind in 'mM':
+        positions = np.asarray(x).astype(np.int64).astype(float)
+        positions[np.isnat(np.asarray(x))] = np.nan
+    else:
+        positions = np.arange(len(values), dtype=float)
+    return min_max_rows(positions, values, max(columns, 1))
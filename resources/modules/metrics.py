@@ -0,0 +1,68 @@
+from matplotlib.backends.backend_agg import RendererAgg
+from matplotlib.font_manager import FontProperties
+
+"""
+Width in pixels of each character measured, by font size in points and DPI.
+Filled as characters are first measured, shared by every plot.
+"""
+CHARACTER_WIDTHS:dict[tuple[float, int], dict[str, float]] = {}
+
+"""
+Height in pixels of a line of text, by font size in points and DPI.
+"""
+LINE_HEIGHTS:dict[tuple[float, int], float] = {}
+
+"""
+Renderer used to measure characters, never drawn to.
+"""
+MEASURE = {}
+
+
+def font_size(size) -> float:
+    """
+    Font size in points of a Matplotlib size, e.g. rcParams['xtick.labelsize'].
+    :param size: Size in points or a size name such as "medium".
+    :return: Size in points.
+    """
+    return FontProperties(size=size).get_size_in_points()
+
+
+def measure(text:str, size:float, dpi:int) -> tuple[float, float]:
+    """
+    Measure text once with the Agg renderer.
+    :param text: Text to measure.
+    :param size: Font size in points.
+    :param dpi: Resolution of the figure.
+    :return: Width and height in pixels.
+    """
+    if dpi not in MEASURE:
+        MEASURE[dpi] = RendererAgg(1, 1, dpi)
+    width, height, _ = MEASURE[dpi].get_text_width_height_descent(text, FontProperties(size=size), ismath=False)
+    return width, height
+
+
+def text_width(text:str, size:float, dpi:int) -> float:
+    """
+    Estimated width of a single line of text,
+     the sum of the widths of its characters from the cached metrics table.
+    :param text: Text, e.g. a tick label.
+    :param size: Font size in points.
+    :param dpi: Resolution of the figure.
+    :return: Width in pixels.
+    """
+    widths = CHARACTER_WIDTHS.setdefault((size, dpi), {})
+    for character in set(text) - widths.keys():
+        widths[character] = measure(character, size, dpi)[0]
+    return sum(widths[character] for character in text)
+
+
+def line_height(size:float, dpi:int) -> float:
+    """
+    Height of a line of text, from the cached metrics table.
+    :param size: Font size in points.
+    :param dpi: Resolution of the figure.
+    :return: Height in pixels.
+    """
+    if (size, dpi) not in LINE_HEIGHTS:
+        LINE_HEIGHTS[(size, dpi)] = measure('Ag', size, dpi)[1]
+    return LINE_HEIGHTS[(size, dpi)]
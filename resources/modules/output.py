@@ -1,4 +1,3 @@
-from json import dump
 
 from PyQt6.QtCore import Qt
 from PyQt6.QtGui import QColor
@@ -6,6 +5,7 @@ from PyQt6.QtPrintSupport import QPrinter, QPrintDialog
 from PyQt6.QtWidgets import (QDialog, QPushButton, QLabel, QLineEdit, QComboBox,
                              QSlider, QMessageBox, QGridLayout, QFileDialog, QTextEdit)
 
+from resources.modules.spec import spec_service
 from resources.modules.utility import COLORS
 
 
@@ -101,8 +101,8 @@ class OutputOptions(QDialog):
         """
         output_dir = QFileDialog.getExistingDirectory(self, 'Destination Folder For Outputting Plot', self.output_dir)
         if output_dir:
-            self.spec['output_dir'] = self.output_dir = output_dir
-            with open('saved/spec.json', 'w') as f: dump(self.spec, f)
+            with spec_service().edit() as spec:
+                spec['output_dir'] = self.output_dir = output_dir
 
     def set_output_format(self, index:int):
         """
@@ -1,9 +1,11 @@
 from PyQt6.QtCore import Qt, QTimer
 from PyQt6.QtGui import QPalette, QColor, QKeySequence
 from PyQt6.QtWidgets import (QTableView, QScrollArea, QVBoxLayout, QPushButton,
-                             QWidget, QMessageBox, QSplitter, QHBoxLayout)
+                             QWidget, QMessageBox, QSplitter, QHBoxLayout, QLabel)
 from matplotlib.backends.backend_qt5agg import NavigationToolbar2QT as NavigationToolbar
+from pandas import DataFrame, concat
 
+from resources.modules.data import lazy_source
 from resources.modules.plot_settings import Settings
 from resources.modules.plotting import PLOT_TYPES, RenderPlot
 from resources.modules.stylesheets import button
@@ -25,11 +27,13 @@ class PlotMap(QWidget):
         self.main_win = main_win
         self.plot_map = plot_map
         self.id = self.plot_map['id']
+        self.source = lazy_source(self.plot_map['data_name']) if isinstance(self.plot_map['data'], DataFrame) else None
         # BACKGROUND COLOR
         self.setAutoFillBackground(True)
         self.set_bg_color()
         # RUN BUTTON
         self.loading_plot = False
+        self.decimation = None
         self.run_plot_button = QPushButton()
         self.run_plot_button.setStyleSheet(button)
         self.reset_run_plot_button_title()
@@ -44,7 +48,7 @@ class PlotMap(QWidget):
         QTimer.singleShot(1000, self.table_data.resizeColumnsToContents)
         self.table_model = TableModel
         if self.plot_map['data'] is not None:
-            self.table_model = TableModel(self.plot_map['data'])
+            self.table_model = TableModel(self.plot_map['data'], self.source)
             self.table_data.setModel(self.table_model)
         self.table_data.verticalHeader().setVisible(False)
         table.setWidget(self.table_data)
@@ -84,9 +88,11 @@ class PlotMap(QWidget):
         Shows: The current graph to be rendered.
                The current plot map name.
                The plot map id.
+               The ratio of rows to rows drawn, if the last render was decimated.
         """
         self.run_plot_button.setText('DRAW PLOT: %s     ON: %s     PLOT ID: %s'
-            % (self.plot_map['graph_name'], self.plot_map['title'], self.plot_map['id']))
+            % (self.plot_map['graph_name'], self.plot_map['title'], self.plot_map['id'])
+            + ('     DECIMATED: %.0f:1' % self.decimation if self.decimation else ''))
 
     def set_bg_color(self):
         """
@@ -105,6 +111,38 @@ class PlotMap(QWidget):
         self.plot_map = plot_map
         self.reset_run_plot_button_title()
 
+    def column_names(self) -> list[str]:
+        """
+        All column names of the plot map data,
+         including those not yet loaded from its data source.
+        :return: List of column names.
+        """
+        if self.source is not None:
+            return list(self.source.columns)
+        if self.plot_map['data'] is not None:
+            return [col for col in self.plot_map['data']]
+        return []
+
+    def load_columns(self, columns:list[str]):
+        """
+        Pull columns into the plot map data from its data source,
+         if they are not already loaded.
+        :param columns: Column names needed, empty names are ignored.
+        """
+        data = self.plot_map['data']
+        if isinstance(data, DataFrame) and self.source is not None:
+            missing = [col for col in dict.fromkeys(columns) if col and col not in data and col in self.source.columns]
+            if missing:
+                loaded = self.source.load(missing)
+                self.plot_map['data'] = loaded if data.columns.empty else concat([data, loaded], axis=1)
+
+    def plot_columns(self) -> list[str]:
+        """
+        Columns the plot map currently renders.
+        :return: List of set x, y and z column names.
+        """
+        return [self.plot_map[coord] for coord in ('x_coord', 'y_coord', 'z_coord') if self.plot_map[coord]]
+
     def plot_loading_prog(self, prog:str):
         """
         Callback connection to RenderPlot.
@@ -130,7 +168,7 @@ class PlotMap(QWidget):
         :return: True if all required parameters are set.
         """
         if self.plot_map['graph_name'] in PLOT_TYPES:
-            axes_ids = PLOT_TYPES[self.plot_map['graph_name']][1]
+            axes_ids = PLOT_TYPES[self.plot_map['graph_name']].axes
             defined = {'x': self.plot_map['x_coord'], 'y': self.plot_map['y_coord'], 'z': self.plot_map['z_coord']}
             checklist = [defined[axes_id] for axes_id in axes_ids]
             if [True for check in checklist if not check]:
@@ -155,4 +193,31 @@ class PlotMap(QWidget):
                                         buttons=QMessageBox.StandardButton.Ok,
                                         defaultButton=QMessageBox.StandardButton.Ok)
             else:
-                self.settings.show()
\ No newline at end of file
+                self.settings.show()
+
+
+class PlotMapPlaceholder(QWidget):
+    def __init__(self, main_win, plot_map):
+        """
+        Lightweight stand in for a saved plot map tab,
+         holding only the plot map with its data reference.
+        Built into a full PlotMap the first time its tab is activated.
+        :param main_win: Instance of the main window, primary application.
+        :param plot_map: Saved plot map, data still as a reference.
+        """
+        QWidget.__init__(self, main_win)
+        self.main_win = main_win
+        self.plot_map = plot_map
+        self.id = self.plot_map['id']
+        layout = QVBoxLayout()
+        layout.addWidget(QLabel('LOADING PLOT: %s     PLOT ID: %s' % (self.plot_map['title'], self.id)),
+                         alignment=Qt.AlignmentFlag.AlignCenter)
+        self.setLayout(layout)
+
+    def build(self) -> PlotMap:
+        """
+        Load the plot map data and create its PlotMap.
+        :return: Full PlotMap instance.
+        """
+        from resources.modules.utility import resolve_plot_data
+        return PlotMap(self.main_win, resolve_plot_data(self.main_win, self.plot_map))
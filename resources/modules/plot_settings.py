@@ -1,4 +1,3 @@
-from os import remove
 from typing import Union
 
 import numpy as np
@@ -8,7 +7,9 @@ from PyQt6.QtWidgets import (QLabel, QLineEdit, QComboBox, QPushButton, QGridLay
                              QFrame, QMessageBox, QVBoxLayout, QTableView, QDialog, QCheckBox, QSlider)
 from pandas import DataFrame
 
-from resources.modules.data import Data
+from resources.modules.catalog import catalog
+from resources.modules.data import Data, lazy_source, remove_data
+from resources.modules.density import DENSITY_AGGREGATES
 from resources.modules.formating import Formater
 from resources.modules.plotting import PLOT_TYPES
 from resources.modules.stylesheets import button, combobox
@@ -30,7 +31,7 @@ class Settings(QWidget):
         self.plot_map_obj.run_plot_button.setText("LOADING>>>")
         self.plot_map_obj.main_win.setDisabled(True)
         self.plot_map = self.plot_map_obj.plot_map
-        self.data = Data(self.plot_map['data'])
+        self.data = Data(self.plot_map['data'], self.plot_map_obj.source)
         self.avail_data = []
 
         # WIDOW DETAILS
@@ -115,6 +116,13 @@ class Settings(QWidget):
         # LABEL EVERY PLOT POINT
         self.label_all = QCheckBox('All Point Labels' if self.plot_map['label_all'] else 'Minimal Point Labels')
         self.label_all.stateChanged.connect(self.swap_label_all)
+        # DECIMATE LINE PLOTS
+        self.decimate = QCheckBox('Decimated Lines' if self.plot_map['decimate'] else 'Exact Lines')
+        self.decimate.stateChanged.connect(self.swap_decimate)
+        # DENSITY AGGREGATE OF LARGE SCATTER PLOTS
+        self.density_selector = QComboBox()
+        self.density_selector.addItems(['Density: %s' % aggregate.title() for aggregate in DENSITY_AGGREGATES])
+        self.density_selector.currentIndexChanged.connect(self.set_density)
         # STRETCH HORIZONTAL
         h_value = self.plot_map['horz_stretch']
         self.horz_stretch_label = QLabel('Horz Stretch: %s' % (h_value / 10) if h_value > 0 else 'Auto-Scaling')
@@ -193,6 +201,8 @@ class Settings(QWidget):
         lower_left_layout.addWidget(self.horz_stretch, 8, 1)
         lower_left_layout.addWidget(self.vert_stretch_label, 9, 0)
         lower_left_layout.addWidget(self.vert_stretch, 9, 1)
+        lower_left_layout.addWidget(self.decimate, 10, 0)
+        lower_left_layout.addWidget(self.density_selector, 10, 1)
         lower_left_frame.setLayout(lower_left_layout)
 
         # RIGHT FRAME
@@ -224,6 +234,8 @@ class Settings(QWidget):
         layout_frame.setLayout(layout)
         self.body.addWidget(layout_frame)
         self.setLayout(self.body)
+        # DATA SOURCES ADDED, REWRITTEN OR REMOVED ELSEWHERE
+        catalog().changed.connect(self.update_combo_boxes, Qt.ConnectionType.QueuedConnection)
 
     def closeEvent(self, event):
         """
@@ -282,7 +294,7 @@ class Settings(QWidget):
         Resets PlotMap table with current plot map data.
         Resets Formater data with current plot map data.
         """
-        self.plot_map_obj.table_model = TableModel(self.plot_map['data'])
+        self.plot_map_obj.table_model = TableModel(self.plot_map['data'], self.plot_map_obj.source)
         self.plot_map_obj.table_data.setModel(self.plot_map_obj.table_model)
         self.plot_map_obj.table_data.resizeColumnsToContents()
         self.formater.set_formated_data()
@@ -302,18 +314,19 @@ class Settings(QWidget):
         Gets the current list of available Data parquet data sources,
          by calling for an update to the Data pqt_sources
          and updates the methods avail data list.
-        Updates each of the selectors that carry the data source options.
+        Updates each of the selectors that carry the data source options,
+         only if the available data sources have changed.
         Updates plot name selector, applying plot map coords as appropriate.
         Updates coord selectors.
         Set the current plot map parameters to the PlotMap settings window.
         """
         self.combo_boxes_updated = False
         avail_data = self.data.update_dict()
-        if avail_data != self.avail_data:
-            self.avail_data = avail_data
-        self.update_data_selector()
-        self.update_delete_selector()
-        self.update_formater_merge_selector()
+        if not self.avail_data or avail_data[1:] != self.avail_data[1:]:
+            self.avail_data = list(avail_data)
+            self.update_data_selector()
+            self.update_delete_selector()
+            self.update_formater_merge_selector()
         self.update_plot_name_selector()
         self.update_coord_selectors()
         self.set_plot_map()
@@ -359,11 +372,11 @@ class Settings(QWidget):
         if self.plot_map['data_name']:
             if self.plot_map['data_name'][:3] == 'iso':
                 if self.plot_map['data_name'][4:7] == 'tri':
-                    plot_names = [plot for plot in PLOT_TYPES.keys() if plot[:3] == 'Tri']
+                    plot_names = [plot for plot in PLOT_TYPES if PLOT_TYPES[plot].shape == 'tri']
                 else:
-                    plot_names = [plot for plot in PLOT_TYPES.keys() if plot[:3] == 'Iso']
+                    plot_names = [plot for plot in PLOT_TYPES if PLOT_TYPES[plot].shape == 'iso']
             else:
-                plot_names = [plot for plot in PLOT_TYPES.keys() if plot[:3] not in ['Tri', 'Iso']]
+                plot_names = [plot for plot in PLOT_TYPES if PLOT_TYPES[plot].shape == 'flat']
             plot_names.insert(0, 'SELECT PLOT')
         self.plot_name_selector.addItems(plot_names)
 
@@ -380,7 +393,7 @@ class Settings(QWidget):
         self.formater.format_coord_selector.clear()
         coords = []
         if self.plot_map['data'] is not None:
-            coords = [coord for coord in self.plot_map['data']]
+            coords = self.plot_map_obj.column_names()
             coords.insert(0, '')
         self.x_coord_selector.addItems(coords)
         self.y_coord_selector.addItems(coords)
@@ -398,7 +411,7 @@ class Settings(QWidget):
         defined = {'x': self.show_x, 'y': self.show_y, 'z': self.show_z}
         required_vars = ()
         if self.plot_map['graph_name']:
-            required_vars = PLOT_TYPES[self.plot_map['graph_name']][1]
+            required_vars = PLOT_TYPES[self.plot_map['graph_name']].axes
         [defined[var](True) if var in required_vars else defined[var](False) for var in defined]
 
     def show_x(self, show:bool):
@@ -454,6 +467,8 @@ class Settings(QWidget):
         self.dpi.setValue(self.plot_map['dpi'])
         self.fit_display.setCheckState(Qt.CheckState.Unchecked if self.plot_map['fit'] else Qt.CheckState.Checked)
         self.label_all.setCheckState(Qt.CheckState.Checked if self.plot_map['label_all'] else Qt.CheckState.Unchecked)
+        self.decimate.setCheckState(Qt.CheckState.Checked if self.plot_map['decimate'] else Qt.CheckState.Unchecked)
+        self.density_selector.setCurrentIndex(DENSITY_AGGREGATES.index(self.plot_map['density']))
         self.horz_stretch.setValue(self.plot_map['horz_stretch'])
         self.vert_stretch.setValue(self.plot_map['vert_stretch'])
 
@@ -486,32 +501,40 @@ class Settings(QWidget):
         Applies data selector name at index to set a new Pandas Dataframe or dictionary of Numpy arrays,
          if selected data is not identical to existing and combo boxes are not being updated.
         Resets data to None if none are selected in data selector.
+        Only the columns being plotted are read,
+         the rest are loaded when the table or Formater uses them.
         :param index: data selector option index value derived from Data pqt_sources.
         """
         if index > 0:
             if self.combo_boxes_updated:
-                data, name = self.data.get_df(index)
-                if self.verify_data_change(data):
+                data, name = self.data.get_df(index, self.plot_map_obj.plot_columns())
+                self.plot_map_obj.source = lazy_source(name) if isinstance(data, DataFrame) else None
+                if self.verify_data_change(data, name):
                     self.reset_plot_map(data, name)
                     self.update_table()
                     self.update_combo_boxes()
         elif self.combo_boxes_updated:
+            self.plot_map_obj.source = None
             self.reset_plot_map(None, '')
             self.update_combo_boxes()
 
-    def verify_data_change(self, data: Union[DataFrame, dict, None]) -> bool:
+    def verify_data_change(self, data: Union[DataFrame, dict, None], name:str) -> bool:
         """
         Compares data structures between plot map data and new data being set.
-        Compares data if types are the same.
+        Compares data if types are the same,
+         only over the columns loaded in new data when it is from the same source.
         :param data: New data, either Pandas Dataframe or dictionary of Numpy Arrays.
+        :param name: Name of new data.
         :return: True, if there is a difference between data objects.
         """
         if self.plot_map_obj.main_win.sources_updating:
             self.plot_map['data'] = data
             return False
         elif isinstance(data, DataFrame) and isinstance(self.plot_map['data'], DataFrame):
-            if data.equals(self.plot_map['data']):
-                return False
+            columns = list(data.columns)
+            if name == self.plot_map['data_name'] and set(columns) <= set(self.plot_map['data'].columns):
+                if data.equals(self.plot_map['data'][columns]):
+                    return False
         elif isinstance(self.plot_map['data'], np.ndarray):
             if data == self.plot_map['data']:
                 return False
@@ -538,6 +561,7 @@ class Settings(QWidget):
         """
         if self.combo_boxes_updated:
             self.plot_map['x_coord'] = self.x_coord_selector.currentText() if index > 0 else ''
+            self.plot_map_obj.load_columns([self.plot_map['x_coord']])
             info = len(self.plot_map['data'][self.plot_map['x_coord']]) if self.plot_map['x_coord'] else ''
             if info:
                 self.x_coord_selector_label.setText('X Coordinate: %s' % info)
@@ -550,6 +574,7 @@ class Settings(QWidget):
         """
         if self.combo_boxes_updated:
             self.plot_map['y_coord'] = self.y_coord_selector.currentText() if index > 0 else ''
+            self.plot_map_obj.load_columns([self.plot_map['y_coord']])
             info = len(self.plot_map['data'][self.plot_map['y_coord']]) if self.plot_map['y_coord'] else ''
             if info:
                 self.y_coord_selector_label.setText('Y Coordinate: %s' % info)
@@ -562,6 +587,7 @@ class Settings(QWidget):
         """
         if self.combo_boxes_updated:
             self.plot_map['z_coord'] = self.z_coord_selector.currentText() if index > 0 else ''
+            self.plot_map_obj.load_columns([self.plot_map['z_coord']])
             info = len(self.plot_map['data'][self.plot_map['z_coord']]) if self.plot_map['z_coord'] else ''
             if info:
                 self.z_coord_selector_label.setText('Z Coordinate: %s' % info)
@@ -665,6 +691,27 @@ class Settings(QWidget):
             self.plot_map_obj.plot_canvas.run()
         self.label_all.setText('All Point Labels' if self.plot_map['label_all'] else 'Minimal Point Labels')
 
+    def swap_decimate(self):
+        """
+        Sets if line plots are decimated to the rows visible at the plot width,
+         or every row is drawn for an exact render.
+        """
+        if self.combo_boxes_updated:
+            self.plot_map['decimate'] = not self.plot_map['decimate']
+            self.plot_map_obj.plot_canvas.run()
+        self.decimate.setText('Decimated Lines' if self.plot_map['decimate'] else 'Exact Lines')
+
+    def set_density(self, index:int):
+        """
+        Sets the aggregate shown by scatter plots drawn as a density image,
+         the count, mean z or max z of the points in each pixel.
+        :param index: Index of aggregate in DENSITY_AGGREGATES.
+        """
+        if self.combo_boxes_updated:
+            self.plot_map['density'] = DENSITY_AGGREGATES[index]
+            if self.plot_map_obj.plot_canvas.density is not None:
+                self.plot_map_obj.plot_canvas.run()
+
     def set_horz_stretch(self, value):
         """
         Defines plot width when it is not fit to plot display.
@@ -715,6 +762,7 @@ class Settings(QWidget):
             if check == 1024:
                 self.plot_map['data_name'] = name
                 self.plot_map['data'] = self.formater.last_formated_data = self.data.save_formated(name)
+                self.plot_map_obj.source = lazy_source(name)
                 self.update_table()
                 self.update_combo_boxes()
                 self.data_selector.setCurrentIndex(self.data_selector.findText(self.plot_map['data_name']))
@@ -756,5 +804,6 @@ class Settings(QWidget):
                                         buttons=QMessageBox.StandardButton.Ok | QMessageBox.StandardButton.Cancel,
                                         defaultButton=QMessageBox.StandardButton.Cancel)
             if check == 1024:
-                remove('saved/data/' + self.data.pqt_sources[index] + '.pqt')
+                remove_data(self.data.pqt_sources[index])
+                catalog().refresh_entry(self.data.pqt_sources[index], False)
                 self.update_combo_boxes()
\ No newline at end of file
@@ -1,3 +1,5 @@
+from math import floor, log10
+from typing import Union
 
 import numpy as np
 from PyQt6.QtCore import pyqtSignal, Qt
@@ -6,6 +8,13 @@ from matplotlib import ticker, rcParams
 from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
 
+from resources.modules.data import numpy_column
+from resources.modules.density import density_grid, DENSITY_POINTS
+from resources.modules.lod import lod_rows
+from resources.modules.metrics import font_size, line_height, text_width
+from resources.modules.spec import spec_service
+from resources.modules.stats import DISTINCT_SKETCH
+
 
 """
 Blank call to force import of Numpy when building application.
@@ -13,76 +22,187 @@ Blank call to force import of Numpy when building application.
 force_numpy_import = np.array([])
 del force_numpy_import
 
+"""
+Most pixels a plot is stretched to along an axis to fit its labels,
+ ticks labelling every point beyond what fit at a line height each are sampled.
+"""
+TICK_MAX_PIXELS = 1 << 14
+
+
+class PlotType:
+    def __init__(self, draw, axes:tuple[str, ...], shape:str='flat', numeric:tuple[str, ...]=(),
+                 prepare=None, budget:Union[int, None]=None, lod:bool=False, density=None):
+        """
+        A registered plot type, drawn by calling it directly on the axes.
+        Draw and prepare functions are called with the axes data (x, y, z)
+         and a stat function returning the min, max or distinct count of an axis,
+         as RenderPlot.column_stat.
+        :param draw: Function drawing onto Matplotlib axes; draw(ax, x, y, z, stat).
+        :param axes: Coordinates needed to create the plot.
+        :param shape: Shape of data accepted.
+                      iso: multidimensional Numpy arrays, shape > 1.
+                      tri: flat or single dimension Numpy arrays, shape == 1.
+                      flat: Pandas Dataframe columns, single dimension.
+        :param numeric: Coordinates that must have numeric data.
+        :param prepare: Pre-aggregation of the axes data before drawing,
+                        returning new axes data; prepare(x, y, z, stat) -> (x, y, z).
+        :param budget: Most points handed to draw, None for all of them.
+        :param lod: Line-style plot that can be decimated to the rows visible at its pixel width,
+                    see lod_rows.
+        :param density: Function drawing the plot as a density image in place of draw,
+                        once it has more points than its budget;
+                        density(ax, x, y, z, aggregate, width, height) -> artist.
+        """
+        self.draw = draw
+        self.axes = axes
+        self.shape = shape
+        self.numeric = numeric
+        self.prepare = prepare
+        self.budget = budget
+        self.lod = lod
+        self.density = density
+
+    def check(self, data:dict):
+        """
+        Verify the axes data is of a type the plot accepts.
+        :param data: Axes data by coordinate.
+        :raise TypeError: If a coordinate needing numbers is not numeric.
+        """
+        for axis in self.numeric:
+            kind = getattr(data[axis], 'dtype', None)
+            if kind is not None and kind.kind not in 'biuf':
+                raise TypeError('%s coordinate must be numeric, not %s.' % (axis.upper(), kind))
+
+    def __call__(self, ax, x, y, z, stat):
+        """
+        Check, prepare and draw the axes data.
+        :param ax: Matplotlib axes.
+        :param x: X coordinate data.
+        :param y: Y coordinate data.
+        :param z: Z coordinate data.
+        :param stat: Stat function of the axes data.
+        :return: Result of draw.
+        """
+        self.check({'x': x, 'y': y, 'z': z})
+        if self.prepare is not None:
+            x, y, z = self.prepare(x, y, z, stat)
+        return self.draw(ax, x, y, z, stat)
+
+
+def histogram_bars(x, y, z, stat) -> tuple:
+    """
+    Bin x and y into unit squares for 3-D Bar Plot.
+    :return: Bar x positions, y positions and heights.
+    """
+    hist, xedges, yedges = np.histogram2d(x, y, bins=int(stat('x', 'max') - stat('x', 'min')),
+                                          range=[[stat('x', 'min'), stat('x', 'max')],
+                                                 [stat('y', 'min'), stat('y', 'max')]])
+    xpos, ypos = np.meshgrid(xedges[:-1] + 0.25, yedges[:-1] + 0.25, indexing="ij")
+    return xpos.ravel(), ypos.ravel(), hist.ravel()
+
+
+def tri_contour(ax, x, y, z, stat, fill:bool):
+    """
+    Tri Contour Plot over its points, with 7 levels across the z range.
+    :param fill: Fill between contours.
+    """
+    ax.plot(x, y, "o", markersize=2, color="grey" if fill else "lightgrey")
+    contour = ax.tricontourf if fill else ax.tricontour
+    return contour(x, y, z, levels=np.linspace(stat('z', 'min'), stat('z', 'max'), 7))
+
+
+def scatter_density(ax, x, y, z, aggregate:str, width:int, height:int):
+    """
+    Scatter Plot as a single image of a cell per pixel,
+     colored by the count, mean z or max z of the points in each.
+    :return: Matplotlib image.
+    """
+    grid, extent = density_grid(x, y, z, aggregate, width, height)
+    return ax.imshow(grid, origin='lower', extent=extent, aspect='auto', interpolation='nearest', cmap='viridis')
+
+
+def iso_scatter_density(ax, x, y, z, aggregate:str, width:int, height:int):
+    """
+    Iso Scatter Plot as a single collection of a point per x and y cell, a cell every 4 pixels,
+     raised to the mean z (or max z) of the points in each and colored by the aggregate.
+    :return: Matplotlib path collection.
+    """
+    width, height = max(width // 4, 1), max(height // 4, 1)
+    heights, extent = density_grid(x, y, z, 'max' if aggregate == 'max' else 'mean', width, height)
+    colors = heights if aggregate != 'count' else density_grid(x, y, z, 'count', width, height)[0]
+    cell_x, cell_y = np.meshgrid(np.linspace(extent[0], extent[1], width), np.linspace(extent[2], extent[3], height))
+    filled = ~np.isnan(heights)
+    return ax.scatter(cell_x[filled], cell_y[filled], heights[filled], c=colors[filled], s=1, cmap='viridis')
+
+
 """
 PLOT TYPES:
- Primary values define a Matplotlib plotting function to be executed as a string.
- Secondary values define which coordinates are needed to create the given plot.
- Named keys utilize a prefix to define the necessary shape and type of data used.
+ Registry of every plot type by name, see PlotType.
+ Named keys utilize a prefix to define the shape of data used, matching each plot type shape.
     Iso must be a multidimensional Numpy array, shape > 1.
     Tri must be a flat or single dimension Numpy array, shape == 1.
     Otherwise it must be a Pandas Dataframe, single dimension.
 """
-PLOT_TYPES = {'Standard Plot': ('self._ax.plot(self.x_data, self.y_data, ".", color=(0.0, 0.0, 1.0),'
-                                ' markeredgewidth=.1, linewidth=.1)', ('x', 'y')), #done
-              'Scatter Plot': ('self._ax.scatter(self.x_data, self.y_data, s=np.array(self.z_data), c=np.array(self.z_data), vmin=0,'
-                               ' vmax=max(self.x_data[self.x_data.idxmax()],  self.y_data[self.y_data.idxmax()]))', ('x', 'y', 'z')), #done
-              'Bar Plot': ('self._ax.bar(self.x_data, self.y_data, width=1, edgecolor="white", linewidth=0.7)', ('x', 'y')), #done
-              '3-D Bar Plot': ('hist, xedges, yedges = np.histogram2d(self.x_data, self.y_data,'
-                               ' bins=int(self.x_data[self.x_data.idxmax()] - self.x_data[self.x_data.idxmin()]),'
-                               ' range=[[self.x_data[self.x_data.idxmin()], self.x_data[self.x_data.idxmax()]],'
-                               ' [self.y_data[self.y_data.idxmin()], self.y_data[self.y_data.idxmax()]]]);'
-                               ' xpos, ypos = np.meshgrid(xedges[:-1] + 0.25, yedges[:-1] + 0.25, indexing="ij");'
-                               ' self._ax.bar3d(xpos.ravel(), ypos.ravel(), 0, 0.5 * np.ones_like(0),'
-                               ' 0.5 * np.ones_like(0), hist.ravel(), zsort="average")', ('x', 'y')), # done
-              'Stem Plot': ('self._ax.stem(self.x_data, self.y_data)', ('x', 'y')), # done
-              # 'Fill Plot (no go)': ('self._ax.fill_between(x1, y1, y2, alpha=.5, linewidth=0);'
-              #                       ' self._ax.plot(x, (y1 + y2) / 2, linewidth=2)', ('x', 'y')), # LOOK AT IN DETAIL
-              'Stack Plot': ('self._ax.stackplot(self.x_data, self.y_data)', ('x', 'y')), # done
-              'Stair Plot': ('self._ax.stairs(self.y_data, linewidth=2, fill=True)', 'y'), # done
-              'Hist Plot': ('self._ax.hist(self.x_data, bins=10, linewidth=0.5, edgecolor="white")', 'x'), # done
-              'Box Plot': ('self._ax.boxplot([self.x_data], positions=[10])', 'x'), # done
-              'Error Plot': ('self._ax.errorbar(self.x_data, self.y_data)', ('x', 'y')), # done
-              'Violin Plot': ('self._ax.violinplot(self.x_data)', 'x'), # done
-              'Event Plot': ('self._ax.eventplot(self.x_data)', 'x'), # done
-              'Hist Scatter Plot': ('self._ax.hist2d(self.x_data, self.y_data)', ('x', 'y')), # done
-              'Hex Bin Plot': ('self._ax.hexbin(self.x_data, self.y_data)', ('x', 'y')), # done
-              'Pie Plot': ('self._ax.pie(np.array(self.x_data))', 'x'), # done ... try with 2d array?
-              'ECDF Plot': ('self._ax.ecdf(self.x_data)', 'x'), # done
-              # 'Img Show Plot (no go)': ('self._ax.imshow(np.array(self.x_data))', 'x'), # NEED NP ARRAY LIKE OR PIL image,
-              # likely need =< 2d, invalid shape
-              # 'Color Mesh Plot (no go)': ('self._ax.pcolormesh(self.x_data, self.y_data, self.z_data)', ('x', 'y', 'z')), # NEED ARRAY
-              # 'Contour Plot (no go)': ('self._ax.contour(self.x_data, self.y_data)', ('x', 'y')), # need array, z must be 2d
-              # 'Contour Fill Plot (no go)': ('self._ax.contourf(self.x_data, self.y_data)', ('x', 'y')), # need array, z must be 2d
-              'Barb Plot': ('self._ax.barbs(self.x_data, self.y_data)', ('x', 'y')), # done
-              'Quiver Plot': ('self._ax.quiver(self.x_data, self.y_data)', ('x', 'y')), # done
-              # 'Stream Plot (no go)': ('self._ax.streamplot(self.x_data, self.y_data)', ('x', 'y')), # missing args u and v
-              'Tri Contour Plot': ('self._ax.plot(self.x_data, self.y_data, "o", markersize=2, color="lightgrey");'
-                                   ' self._ax.tricontour(self.x_data, self.y_data, self.z_data,'
-                                   ' levels=np.linspace(self.z_data[self.z_data.idxmin()], self.z_data[self.z_data.idxmax()], 7))',
-                                   ('x', 'y', 'z')), # done
-              'Tri Contour Fill Plot': ('self._ax.plot(self.x_data, self.y_data, "o", markersize=2, color="grey");'
-                                        ' self._ax.tricontourf(self.x_data, self.y_data, self.z_data,'
-                                        ' levels=np.linspace(self.z_data[self.z_data.idxmin()], self.z_data[self.z_data.idxmax()], 7))',
-                                        ('x', 'y', 'z')), # done
-              'Tri Plot': ('self._ax.triplot(self.x_data, self.y_data)', ('x', 'y')), # done
-              'Tri Surf Plot': ('self._ax.plot_trisurf(self.x_data, self.y_data, self.z_data,'
-                                ' linewidth=0.2, antialiased=True)', ('x', 'y', 'z')), # done
-              'Iso Wireframe Plot': ('self._ax.plot_wireframe(self.x_data, self.y_data, self.z_data,'
-                                     ' rstride=10, cstride=10, cmap="viridis")', ('x', 'y', 'z')), # done
-              'Iso Wire Plot': ('self._ax.plot_wireframe(self.x_data, self.y_data, self.z_data)', ('x', 'y', 'z')), # done
-              'Iso Surface Plot': ('self._ax.plot_surface(self.x_data, self.y_data, self.z_data)', ('x', 'y', 'z')), # done
-              'Iso Surface Highlight Plot': ('self._ax.plot_surface(self.x_data, self.y_data, self.z_data,'
-                                             ' rstride=1, cstride=1, cmap="viridis", edgecolor="none")',
-                                             ('x', 'y', 'z')), # done
-              # 'Iso Fill Plot (no go)': ('self._ax.fill_between(x1, y1, z1, x2, y2, z2, alpha=0.5);'
-              #                   ' self._ax.plot(x1, y1, z1); ax.plot(x2, y2, z2)', ('x', 'y', 'z')),# LOOK AT IN DETAIL
-              'Iso Standard Plot': ('self._ax.plot(self.x_data, self.y_data, self.z_data)', ('x', 'y', 'z')), # done
-              # 'Iso Quiver Plot (no go)': ('self._ax.quiver(self.x_data, self.y_data, self.z_data)', ('x', 'y', 'z')), # missing u, v, w
-              'Iso Scatter Plot': ('self._ax.scatter(self.x_data, self.y_data, self.z_data)', ('x', 'y', 'z')), # done
+PLOT_TYPES = {'Standard Plot': PlotType(lambda ax, x, y, z, stat: ax.plot(x, y, ".", color=(0.0, 0.0, 1.0),
+                                                                         markeredgewidth=.1, linewidth=.1),
+                                        ('x', 'y'), lod=True),
+              'Scatter Plot': PlotType(lambda ax, x, y, z, stat: ax.scatter(x, y, s=np.array(z), c=np.array(z), vmin=0,
+                                                                           vmax=max(stat('x', 'max'), stat('y', 'max'))),
+                                       ('x', 'y', 'z'), numeric=('x', 'y', 'z'), budget=DENSITY_POINTS,
+                                       density=scatter_density),
+              'Bar Plot': PlotType(lambda ax, x, y, z, stat: ax.bar(x, y, width=1, edgecolor="white", linewidth=0.7),
+                                   ('x', 'y')),
+              '3-D Bar Plot': PlotType(lambda ax, x, y, z, stat: ax.bar3d(x, y, 0, 0.5 * np.ones_like(0),
+                                                                         0.5 * np.ones_like(0), z, zsort="average"),
+                                       ('x', 'y'), numeric=('x', 'y'), prepare=histogram_bars),
+              'Stem Plot': PlotType(lambda ax, x, y, z, stat: ax.stem(x, y), ('x', 'y'), lod=True),
+              # 'Fill Plot (no go)': fill_between(x1, y1, y2, alpha=.5, linewidth=0); plot(x, (y1 + y2) / 2, linewidth=2)
+              'Stack Plot': PlotType(lambda ax, x, y, z, stat: ax.stackplot(x, y), ('x', 'y'), lod=True),
+              'Stair Plot': PlotType(lambda ax, x, y, z, stat: ax.stairs(y, None if x is None else np.append(x, np.asarray(x)[-1] + 1),
+                                                                        linewidth=2, fill=True), ('y',), lod=True),
+              'Hist Plot': PlotType(lambda ax, x, y, z, stat: ax.hist(x, bins=10, linewidth=0.5, edgecolor="white"),
+                                    ('x',)),
+              'Box Plot': PlotType(lambda ax, x, y, z, stat: ax.boxplot([x], positions=[10]), ('x',), numeric=('x',)),
+              'Error Plot': PlotType(lambda ax, x, y, z, stat: ax.errorbar(x, y), ('x', 'y'), lod=True),
+              'Violin Plot': PlotType(lambda ax, x, y, z, stat: ax.violinplot(x), ('x',), numeric=('x',)),
+              'Event Plot': PlotType(lambda ax, x, y, z, stat: ax.eventplot(x), ('x',)),
+              'Hist Scatter Plot': PlotType(lambda ax, x, y, z, stat: ax.hist2d(x, y), ('x', 'y'), numeric=('x', 'y')),
+              'Hex Bin Plot': PlotType(lambda ax, x, y, z, stat: ax.hexbin(x, y), ('x', 'y'), numeric=('x', 'y')),
+              'Pie Plot': PlotType(lambda ax, x, y, z, stat: ax.pie(np.array(x)), ('x',), numeric=('x',)),
+              'ECDF Plot': PlotType(lambda ax, x, y, z, stat: ax.ecdf(x), ('x',), numeric=('x',)),
+              # 'Img Show Plot (no go)': imshow(np.array(x)), need np array like or PIL image, likely =< 2d, invalid shape
+              # 'Color Mesh Plot (no go)': pcolormesh(x, y, z), need array
+              # 'Contour Plot (no go)': contour(x, y), need array, z must be 2d
+              # 'Contour Fill Plot (no go)': contourf(x, y), need array, z must be 2d
+              'Barb Plot': PlotType(lambda ax, x, y, z, stat: ax.barbs(x, y), ('x', 'y')),
+              'Quiver Plot': PlotType(lambda ax, x, y, z, stat: ax.quiver(x, y), ('x', 'y')),
+              # 'Stream Plot (no go)': streamplot(x, y), missing args u and v
+              'Tri Contour Plot': PlotType(lambda ax, x, y, z, stat: tri_contour(ax, x, y, z, stat, False),
+                                           ('x', 'y', 'z'), 'tri', numeric=('z',)),
+              'Tri Contour Fill Plot': PlotType(lambda ax, x, y, z, stat: tri_contour(ax, x, y, z, stat, True),
+                                                ('x', 'y', 'z'), 'tri', numeric=('z',)),
+              'Tri Plot': PlotType(lambda ax, x, y, z, stat: ax.triplot(x, y), ('x', 'y'), 'tri'),
+              'Tri Surf Plot': PlotType(lambda ax, x, y, z, stat: ax.plot_trisurf(x, y, z, linewidth=0.2,
+                                                                                 antialiased=True),
+                                        ('x', 'y', 'z'), 'tri'),
+              'Iso Wireframe Plot': PlotType(lambda ax, x, y, z, stat: ax.plot_wireframe(x, y, z, rstride=10, cstride=10,
+                                                                                        cmap="viridis"),
+                                             ('x', 'y', 'z'), 'iso'),
+              'Iso Wire Plot': PlotType(lambda ax, x, y, z, stat: ax.plot_wireframe(x, y, z), ('x', 'y', 'z'), 'iso'),
+              'Iso Surface Plot': PlotType(lambda ax, x, y, z, stat: ax.plot_surface(x, y, z), ('x', 'y', 'z'), 'iso'),
+              'Iso Surface Highlight Plot': PlotType(lambda ax, x, y, z, stat: ax.plot_surface(x, y, z, rstride=1, cstride=1,
+                                                                                              cmap="viridis",
+                                                                                              edgecolor="none"),
+                                                     ('x', 'y', 'z'), 'iso'),
+              # 'Iso Fill Plot (no go)': fill_between(x1, y1, z1, x2, y2, z2, alpha=0.5); plot(x1, y1, z1); plot(x2, y2, z2)
+              'Iso Standard Plot': PlotType(lambda ax, x, y, z, stat: ax.plot(x, y, z), ('x', 'y', 'z'), 'iso'),
+              # 'Iso Quiver Plot (no go)': quiver(x, y, z), missing u, v, w
+              'Iso Scatter Plot': PlotType(lambda ax, x, y, z, stat: ax.scatter(x, y, z), ('x', 'y', 'z'), 'iso',
+                                           numeric=('x', 'y', 'z'), budget=DENSITY_POINTS, density=iso_scatter_density),
               }
-              # 'Iso Stem Plot (no go)': ('self._ax.stem(self.x_data, self.y_data, self.z_data)', ('x', 'y', 'z')), # CRASHES, no info!!!
-              # 'Iso Voxel Plot (no go)': ('self._ax.voxels(voxelarray)', ('x', 'y', 'z')),  # NEED TO LOOK AT IN DETAIL
-              # 'Dynamic Plot (no go)': ('dynamic()', ('x', 'y'))} # NEED TO CREATE
+              # 'Iso Stem Plot (no go)': stem(x, y, z), crashes, no info
+              # 'Iso Voxel Plot (no go)': voxels(voxelarray), need to look at in detail
+              # 'Dynamic Plot (no go)': dynamic(), need to create
 
 
 def dynamic():
@@ -115,6 +235,8 @@ class RenderPlot(QWidget):
         self.x_label_size = 0
         self.y_label_size = 0
         self.rotate = True
+        self.density = None
+        self.density_size = None
         # FIGURE CANVAS
         self.fig = Figure(dpi=100, layout='tight')
         self.canvas = FigureCanvas(self.fig)
@@ -123,6 +245,8 @@ class RenderPlot(QWidget):
                                        color='gray', alpha=0.5, ha='center', va='center', rotation=0), ]
         # MOUSE CLICK EVENT
         self.fig.canvas.mpl_connect("button_release_event", self.on_click)
+        # RESIZE EVENT
+        self.fig.canvas.mpl_connect("resize_event", self.density_resized)
         # ROTATION STYLE
         rcParams['axes3d.mouserotationstyle'] = 'sphere'
         # ELEVATION SLIDER
@@ -185,25 +309,107 @@ class RenderPlot(QWidget):
     def run(self):
         """
         Renders plot data from the plot map with the specified graph.
-        Makes a call to the PLOT_TYPES dict to set the axes for the graph.
+        Calls the plot type registered in PLOT_TYPES to draw on the axes,
+         with only the coordinates it uses.
+        Line-style plots are decimated to the rows visible at the plot width,
+         unless decimation is turned off in the plot map.
+        Scatter plots of more points than their budget are drawn as a density image,
+         binned again at the axes size once the plot is laid out, before it is drawn.
         """
         self.fig.clf()
+        self.density = None
         self.x_label_size = 0
         self.y_label_size = 0
         self.define_column_data()
         graph_name = self.plot_map_obj.plot_map['graph_name']
         try:
             self.set_config()
-            exec(PLOT_TYPES[graph_name][0])
+            plot_type = PLOT_TYPES[graph_name]
+            x, y, z = (getattr(self, '%s_data' % axis) if axis in plot_type.axes else None for axis in 'xyz')
+            self.plot_map_obj.decimation = None
+            if plot_type.lod and self.plot_map_obj.plot_map['decimate']:
+                x, y = self.decimate(x, y)
+            if plot_type.density is not None and np.size(x) > self.density_points(plot_type):
+                plot_type.check({'x': x, 'y': y, 'z': z})
+                self.density = (plot_type, x, y, z, None)
+                self.draw_density()
+            else:
+                plot_type(self._ax, x, y, z, self.column_stat)
             self.structure_plot()
+            if self.density is not None:
+                self.fig.get_layout_engine().execute(self.fig)
+                if self.axes_size() != self.density_size:
+                    self.draw_density()
             self.canvas.draw()
-            if self.x_label_size + self.y_label_size > 0:
-                self.structure_plot()
-                self.canvas.draw()
         except (TypeError, KeyError, NameError, ValueError) as e:
             self.plot_error(graph_name, e)
         self.fin.emit()
 
+    def decimate(self, x, y) -> tuple:
+        """
+        Reduce a line-style plot to the first, last, lowest and highest rows of each pixel column,
+         keeping its visual envelope.
+        Records the ratio of rows to rows drawn in the plot map instance.
+        :param x: X coordinate data, None if the plot has none.
+        :param y: Y coordinate data.
+        :return: Decimated x and y data,
+                 x is the position of each row kept if the plot has no x coordinate.
+        """
+        rows = lod_rows(x, y, self.plot_width())
+        if rows is None or len(rows) == 0:
+            return x, y
+        self.plot_map_obj.decimation = len(y) / len(rows)
+        return rows if x is None else x.iloc[rows], y.iloc[rows]
+
+    def density_points(self, plot_type:PlotType) -> int:
+        """
+        Points above which a plot type is drawn as a density image,
+         spec density_points if set, otherwise its budget.
+        :param plot_type: Registered plot type.
+        :return: Point count.
+        """
+        return int(spec_service().spec.get('density_points') or plot_type.budget)
+
+    def draw_density(self):
+        """
+        Draw the density image at the current pixel size of the axes,
+         replacing any image drawn at a previous size.
+        """
+        plot_type, x, y, z, artist = self.density
+        if artist is not None:
+            artist.remove()
+        self.density_size = self.axes_size()
+        artist = plot_type.density(self._ax, x, y, z, self.plot_map_obj.plot_map['density'], *self.density_size)
+        self.density = (plot_type, x, y, z, artist)
+
+    def axes_size(self) -> tuple[int, int]:
+        """
+        Current pixel size of the axes.
+        :return: Width and height in pixels.
+        """
+        box = self._ax.get_window_extent()
+        return int(box.width), int(box.height)
+
+    def density_resized(self, event):
+        """
+        Recompute the density image when the canvas is resized,
+         so it keeps a cell per pixel.
+        Skipped if the axes are the size the image was binned at,
+         as when the canvas is resized to the size run already drew it at.
+        :param event: Matplotlib resize event.
+        """
+        if self.density is not None and self.axes_size() != self.density_size:
+            self.draw_density()
+            self.canvas.draw_idle()
+
+    def plot_width(self) -> int:
+        """
+        Pixel width the plot is drawn at,
+         the larger of its last drawn width and the display area.
+        :return: Width in pixels.
+        """
+        return max(self.width(), self.plot_map_obj.canvas_scroll_area.width())
+
     def plot_error(self, graph_name:str, error:str):
         """
         Output a plot with the error created from a failed attempt at rendering.
@@ -221,14 +427,38 @@ class RenderPlot(QWidget):
 
     def define_column_data(self):
         """
-        Pull data from plot map data for each defined column.
+        Pull data from plot map data for each defined column,
+         loading any column not yet read from its data source.
+        Arrow-backed columns are given Numpy dtypes for Matplotlib.
         """
         col_x = self.plot_map_obj.plot_map['x_coord']
         col_y = self.plot_map_obj.plot_map['y_coord']
         col_z = self.plot_map_obj.plot_map['z_coord']
-        if col_x: self.x_data = self.plot_map_obj.plot_map['data'][col_x]
-        if col_y: self.y_data = self.plot_map_obj.plot_map['data'][col_y]
-        if col_z: self.z_data = self.plot_map_obj.plot_map['data'][col_z]
+        self.plot_map_obj.load_columns([col_x, col_y, col_z])
+        if col_x: self.x_data = numpy_column(self.plot_map_obj.plot_map['data'][col_x])
+        if col_y: self.y_data = numpy_column(self.plot_map_obj.plot_map['data'][col_y])
+        if col_z: self.z_data = numpy_column(self.plot_map_obj.plot_map['data'][col_z])
+
+    def column_stat(self, axis:str, stat:str) -> Union[int, float]:
+        """
+        Min, max or distinct count of a plotted column,
+         from the stats saved with its data source,
+         only computed from the column data if there are none.
+        Distinct counts include missing values as one value,
+         and are counted exactly from the column data once the saved count is an estimate.
+        :param axis: Coordinate of the column; x, y or z.
+        :param stat: Stat name; min, max or distinct.
+        :return: Stat value.
+        """
+        source = self.plot_map_obj.source
+        column = self.plot_map_obj.plot_map['%s_coord' % axis]
+        value = source.column_stat(column, stat) if source is not None else None
+        if value is not None and stat == 'distinct':
+            value = None if value >= DISTINCT_SKETCH else value + (1 if source.column_stat(column, 'nulls') else 0)
+        if value is None:
+            data = getattr(self, '%s_data' % axis)
+            value = data.nunique(dropna=False) if stat == 'distinct' else getattr(data, stat)()
+        return value
 
     def set_config(self):
         """
@@ -260,11 +490,13 @@ class RenderPlot(QWidget):
     def structure_plot(self):
         """
         Apply plot structure defined by plot map.
+        Label sizes are estimated from font metrics before the plot is sized,
+         so it is only drawn once.
         """
         self.set_gridlines()
         self.set_extended_ticks()
-        self.resize_plot()
         self.set_label_size()
+        self.resize_plot()
 
     def set_gridlines(self):
         """
@@ -276,29 +508,59 @@ class RenderPlot(QWidget):
     def set_extended_ticks(self):
         """
         Define which ticks are shown and how often.
+        Axis limits are set from the distinct count of each column.
+        Labelling every point labels each position while they fit the tick budget,
+         otherwise every n-th position, see tick_step.
         """
         if not self.plot_map_obj.plot_map['fit'] and not self.iso:
             if self.plot_map_obj.plot_map['x_coord']:
+                self._ax.set_xlim(-1, self.column_stat('x', 'distinct') + 1)
                 if self.plot_map_obj.plot_map['label_all']:
-                    self._ax.xaxis.set_major_locator(ticker.MultipleLocator(1))
-                unique_x = self.plot_map_obj.plot_map['data'].duplicated(self.plot_map_obj.plot_map['x_coord'])
-                self._ax.set_xlim(-1, unique_x.value_counts().to_dict()[False] + 1)
+                    self._ax.xaxis.set_major_locator(ticker.MultipleLocator(self.tick_step('x')))
             if self.plot_map_obj.plot_map['y_coord']:
+                self._ax.set_ylim(-1, self.column_stat('y', 'distinct') + 1)
                 if self.plot_map_obj.plot_map['label_all']:
-                    self._ax.yaxis.set_major_locator(ticker.MultipleLocator(1))
-                unique_y = self.plot_map_obj.plot_map['data'].duplicated(self.plot_map_obj.plot_map['y_coord'])
-                self._ax.set_ylim(-1, unique_y.value_counts().to_dict()[False] + 1)
+                    self._ax.yaxis.set_major_locator(ticker.MultipleLocator(self.tick_step('y')))
+
+    def tick_budget(self, axis:str) -> int:
+        """
+        Most tick labels an axis can show,
+         a line height each within TICK_MAX_PIXELS,
+         and no more than a Matplotlib locator places without warning,
+         less the ticks a locator adds past each end of the axis and the closing tick.
+        :param axis: Axis name; x or y.
+        :return: Tick count.
+        """
+        size = font_size(rcParams['%stick.labelsize' % axis])
+        budget = int(TICK_MAX_PIXELS // line_height(size, self.plot_map_obj.plot_map['dpi']))
+        return min(max(budget, 1), ticker.Locator.MAXTICKS - 3)
+
+    def tick_step(self, axis:str) -> float:
+        """
+        Spacing of ticks labelling every point of an axis,
+         1 if every position fits the tick budget,
+         otherwise the smallest 1, 2 or 5 times a power of 10 that does.
+        :param axis: Axis name; x or y.
+        :return: Tick spacing in data units.
+        """
+        low, high = sorted((self._ax.xaxis if axis == 'x' else self._ax.yaxis).get_view_interval())
+        budget = self.tick_budget(axis)
+        if high - low <= budget:
+            return 1
+        spacing = (high - low) / budget
+        magnitude = 10 ** floor(log10(spacing))
+        return next(factor * magnitude for factor in (1, 2, 5, 10) if factor * magnitude >= spacing)
 
     def resize_plot(self):
         """
         Applies DPI,effectively resizing fonts
          while maintaining overall size aspects relative to the display area.
-        Scale plot to parameters set in plot map.
+        Scale plot to parameters set in plot map,
+         stretching from the size of the display area.
         """
-        canvas_width, canvas_height = self.canvas.figure.get_size_inches() * self.fig.dpi
-        horz_stretch = self.set_horz_stretch(canvas_width)
-        vert_stretch = self.set_vert_stretch(canvas_height)
         scroll_area_size = self.plot_map_obj.canvas_scroll_area.size()
+        horz_stretch = self.set_horz_stretch(scroll_area_size.width() - 22)
+        vert_stretch = self.set_vert_stretch(scroll_area_size.height() - 22)
         dpi = self.plot_map_obj.plot_map['dpi']
         self.canvas.figure.set_dpi(dpi)
         width = int((scroll_area_size.width() - 2) * horz_stretch)
@@ -309,49 +571,66 @@ class RenderPlot(QWidget):
 
     def set_horz_stretch(self, canvas_width:float) -> float:
         """
-        Define scaling of horizontal axis
-        :param canvas_width: current width of the plot canvas
+        Define scaling of horizontal axis,
+         growing to fit its labels no further than TICK_MAX_PIXELS.
+        :param canvas_width: width of the display area
         :return: horizontal stretch.
         """
         if self.plot_map_obj.plot_map['horz_stretch'] > 0:
             return self.plot_map_obj.plot_map['horz_stretch']
         if self.x_label_size == 0 or self.plot_map_obj.plot_map['fit'] and self.iso:
             return 1
-        return self.x_label_size / canvas_width
+        return min(self.x_label_size, TICK_MAX_PIXELS) / canvas_width
 
     def set_vert_stretch(self, canvas_height:float) -> float:
         """
-        Define scaling of vertical axis.
-        :param canvas_height: current height of the plot canvas
+        Define scaling of vertical axis,
+         growing to fit its labels no further than TICK_MAX_PIXELS.
+        :param canvas_height: height of the display area
         :return: vertical stretch.
         """
         if self.plot_map_obj.plot_map['vert_stretch'] > 0:
             return self.plot_map_obj.plot_map['vert_stretch']
         if self.plot_map_obj.plot_map['fit'] and self.iso or self.y_label_size == 0:
             return 1
-        return self.y_label_size / canvas_height
+        return min(self.y_label_size, TICK_MAX_PIXELS) / canvas_height
 
 
     def set_label_size(self):
         """
         Define the size factor for the new plot,
-         redraws the plot if label sizes are > 0,
-         sets which ticks are affected based on plot map parameters.
+         from the tick labels it will draw, before it is drawn.
+        Label sizes are estimated from the cached font metrics table,
+         x tick labels are rotated so each takes a line height across.
+        Sets which ticks are affected based on plot map parameters.
         """
         if not self.iso and not self.plot_map_obj.plot_map['fit']:
-            renderer = self.canvas.get_renderer()
+            dpi = self.plot_map_obj.plot_map['dpi']
+            x_size, y_size = font_size(rcParams['xtick.labelsize']), font_size(rcParams['ytick.labelsize'])
+            x_labels, y_labels = self.tick_labels(self._ax.xaxis), self.tick_labels(self._ax.yaxis)
             plot_title_height = 50
             x_title = 50
             y_title = 50
             if self.plot_map_obj.plot_map['vert_stretch'] == 0:
-                y_label_size = sum([t.get_window_extent(renderer=renderer).height for t in self._ax.get_yticklabels()])
-                x_text_length = max([t.get_window_extent(renderer=renderer).height for t in self._ax.get_xticklabels()])
+                y_label_size = len(y_labels) * line_height(y_size, dpi)
+                x_text_length = max([text_width(label, x_size, dpi) for label in x_labels] + [0])
                 self.y_label_size = y_label_size + x_text_length + x_title + plot_title_height
             if self.plot_map_obj.plot_map['horz_stretch'] == 0:
-                x_label_size = sum([t.get_window_extent(renderer=renderer).width for t in self._ax.get_xticklabels()])
-                y_text_length = max([t.get_window_extent(renderer=renderer).width for t in self._ax.get_yticklabels()])
+                x_label_size = len(x_labels) * line_height(x_size, dpi)
+                y_text_length = max([text_width(label, y_size, dpi) for label in y_labels] + [0])
                 self.x_label_size = x_label_size + y_text_length + y_title
 
+    def tick_labels(self, axis) -> list[str]:
+        """
+        Labels of the major ticks an axis will draw within its view limits,
+         taken from its locator and formatter without drawing.
+        :param axis: Matplotlib x or y axis.
+        :return: Tick label text.
+        """
+        low, high = sorted(axis.get_view_interval())
+        ticks = [tick for tick in axis.get_majorticklocs() if low <= tick <= high]
+        return axis.get_major_formatter().format_ticks(ticks)
+
     def on_click(self, event):
         """
         Rotates isometric by degrees provided when left mouse button is held down.
@@ -1,21 +1,36 @@
 import os.path
-from json import dump, load
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from copy import deepcopy
+from multiprocessing import get_context
 from os import listdir, remove
 from pathlib import Path
 from shutil import copyfile
 from sys import modules
 from typing import Union, TextIO
 
-import numpy as np
-from PyQt6.QtCore import QThread, QThreadPool, QMutex, pyqtSlot, QRunnable, QObject, Qt
+from PyQt6.QtCore import QThread, QThreadPool, pyqtSlot, QRunnable, QObject, Qt
 from PyQt6.QtWidgets import (QDialog, QPushButton, QComboBox, QTextEdit, QGridLayout,
-                             QFileDialog, QLabel, QApplication, QCheckBox)
-from chardet import universaldetector
-from numpy import asarray
-from pandas import read_csv, read_json, read_excel, Timestamp
+                             QFileDialog, QLabel, QApplication, QCheckBox, QLineEdit)
 
 from resources.modules.create_sources import *
-from resources.modules.utility import save_data_as_parquet, resource_path
+from resources.modules.data import remove_data, data_files
+from resources.modules.ingest import ingest_source, ingest_workers
+from resources.modules.sql_connect import ingest_sql, BACKENDS, SQL_SOURCE
+from resources.modules.utility import (save_data_as_parquet, resource_path, get_compression, file_state,
+                                       detect_encoding, sample_hash, Encrypt, COMPRESSION, CODECS, ENCODING_SAMPLE)
+
+"""
+Compression options offered per data source, as codec and level.
+"""
+COMPRESSION_OPTIONS = {'Workspace Default': None,
+                       'zstd (fast, level 1)': ('zstd', 1),
+                       'zstd (level 3)': ('zstd', 3),
+                       'zstd (small, level 9)': ('zstd', 9),
+                       'zstd (smallest, level 19)': ('zstd', 19),
+                       'lz4': ('lz4', None),
+                       'snappy': ('snappy', None),
+                       'gzip': ('gzip', CODECS['gzip']),
+                       'none': ('none', None)}
 
 
 class Source(QDialog):
@@ -39,7 +54,7 @@ class Source(QDialog):
         self.close_requested = False
         self.update_data_action = main_win.update_data_action
         self.update_spec_pool = QThreadPool()
-        self.mutex = QMutex()
+        self.spec_service = main_win.spec_service
         # INFO TEXT
         self.info = QLabel('')
         # PREFIX CHECKBOXES
@@ -49,6 +64,10 @@ class Source(QDialog):
         # GET PRIMARY SOURCE BUTTON
         local_csv_button = QPushButton('Get Local Data Source')
         local_csv_button.clicked.connect(lambda click: self.get_new_source())
+        # GET SQL SOURCE BUTTON
+        self.sql_win = SqlSource(self)
+        sql_button = QPushButton('Add SQL Data Source')
+        sql_button.clicked.connect(lambda click: self.sql_win.show())
         # GET SAMPLE SOURCES BUTTON
         samples_button = QPushButton('Load Sample Data Sources')
         samples_button.clicked.connect(lambda click: self.load_samples())
@@ -58,6 +77,12 @@ class Source(QDialog):
         # DISPLAY FILE PATH TO INDICATED SOURCE
         self.local_csv_address = QTextEdit('No Source Selected')
         self.local_csv_address.setEnabled(False)
+        # SOURCE COMPRESSION SELECTOR
+        self.showing_source = False
+        self.compression_label = QLabel('Compression: %s' % self.compression_text(None))
+        self.compression_selector = QComboBox(self)
+        self.compression_selector.addItems(COMPRESSION_OPTIONS.keys())
+        self.compression_selector.currentTextChanged.connect(self.set_compression)
         # DELETE PRIMARY SOURCE BUTTON
         remove_source_button = QPushButton('Remove Data Source')
         remove_source_button.clicked.connect(lambda click: self.remove_source())
@@ -69,9 +94,12 @@ class Source(QDialog):
         layout.addWidget(self.info)
         layout.addWidget(self.prefix_check)
         layout.addWidget(local_csv_button)
+        layout.addWidget(sql_button)
         layout.addWidget(samples_button)
         layout.addWidget(self.existing_sources)
         layout.addWidget(self.local_csv_address)
+        layout.addWidget(self.compression_label)
+        layout.addWidget(self.compression_selector)
         layout.addWidget(remove_source_button)
         self.setLayout(layout)
 
@@ -82,8 +110,7 @@ class Source(QDialog):
         :param a0: PyQt close event
         """
         a0.ignore()
-        if self.mutex.tryLock():
-            self.mutex.unlock()
+        if not self.update_spec_pool.activeThreadCount():
             if not self.isEnabled():
                 self.setDisabled(False)
                 self.close_requested = False
@@ -97,13 +124,10 @@ class Source(QDialog):
     @pyqtSlot()
     def spec_updated(self):
         """
-        Reloads applications spec file,
-         after new sources are added.
+        Called after new sources are added to the spec.
         Closes add source window,
          if it was called.
         """
-        with open('saved/spec.json', 'r') as f:
-            self.spec = self.main_win.spec = load(f)
         self.info.setText('')
         if self.close_requested:
             self.close()
@@ -115,9 +139,67 @@ class Source(QDialog):
         """
         self.source_index = index
         try:
-            self.local_csv_address.setText(self.spec['sources'][self.sources[index]][0])
+            if self.sources[index].endswith('.sql'):
+                sql = self.spec['sql_sources'][self.data_name()]
+                self.local_csv_address.setText('%s: %s\n%s' % (sql['backend'], sql['database'], sql['query']))
+            else:
+                self.local_csv_address.setText(self.spec['sources'][self.sources[index]][0])
         except (KeyError, IndexError):
             self.local_csv_address.setText('Data Does Not Have Source Location, Re-Associate Data to Source.')
+        self.show_compression()
+
+    def data_name(self) -> Union[str, None]:
+        """
+        Name of the parquet data created from the selected primary source.
+        :return: Source name without file extension, None if no source is selected.
+        """
+        if 0 <= self.source_index < len(self.sources):
+            source = self.sources[self.source_index]
+            return source[:source.rfind('.')]
+        return None
+
+    def compression_text(self, data_name:Union[str, None]) -> str:
+        """
+        Readable codec and level a data source is written with.
+        :param data_name: Data source name, None for the workspace setting.
+        :return: Codec with level if it has one.
+        """
+        codec, level = get_compression(self.spec, data_name)
+        return codec if level is None else '%s %s' % (codec, level)
+
+    def show_compression(self):
+        """
+        Display the compression set for the selected primary source.
+        """
+        self.showing_source = True
+        data_name = self.data_name()
+        setting = self.spec.get('compression', COMPRESSION)['sources'].get(data_name)
+        option = 'Workspace Default'
+        if setting is not None:
+            for name, codec in COMPRESSION_OPTIONS.items():
+                if codec == (setting['codec'], setting['level']):
+                    option = name
+        self.compression_selector.setCurrentText(option)
+        self.compression_label.setText('Compression: %s' % self.compression_text(data_name))
+        self.showing_source = False
+
+    def set_compression(self, option:str):
+        """
+        Save the parquet codec and level for the selected primary source to the spec file,
+         applied the next time its data is updated.
+        :param option: Name of compression option.
+        """
+        data_name = self.data_name()
+        if self.showing_source or data_name is None:
+            return
+        with self.spec_service.edit() as spec:
+            compression = spec.setdefault('compression', deepcopy(COMPRESSION))
+            if COMPRESSION_OPTIONS[option] is None:
+                compression['sources'].pop(data_name, None)
+            else:
+                codec, level = COMPRESSION_OPTIONS[option]
+                compression['sources'][data_name] = {'codec': codec, 'level': level}
+        self.compression_label.setText('Compression: %s' % self.compression_text(data_name))
 
     def load_samples(self):
         """
@@ -135,7 +217,7 @@ class Source(QDialog):
          and get new primary source data.
         """
         root = self.spec['source_dir'] if self.spec['source_dir'] else os.path.abspath(os.sep)
-        extensions = 'DATA (*.csv *.xls* *.json)'
+        extensions = 'DATA (*.csv *.xls* *.json *.jsonl *.ndjson)'
         source_file_path, ok = QFileDialog.getOpenFileName(self, 'Select Data Source To Add', root, extensions)
         if ok:
             self.info.setText('Loading Primary Source Data')
@@ -174,7 +256,7 @@ class Source(QDialog):
             self.existing_sources.addItem(source_name)
             self.existing_sources.setCurrentIndex(self.sources.index(source_name))
             self.update_data_action.setText('Update Data From New Sources')
-        update_spec = UpdateSpecSource(self.mutex, source_name, source_file_path)
+        update_spec = UpdateSpecSource(self.spec_service, source_name, source_file_path)
         update_spec.signals.fin.connect(self.spec_updated)
         self.update_spec_pool.start(update_spec)
         if self.existing_sources.currentIndex() == self.sources.index(source_name):
@@ -188,16 +270,94 @@ class Source(QDialog):
         Delete the selected primary source as well as its spec dictionary reference.
         """
         if self.sources:
-            if self.sources[self.source_index] in self.spec['sources']:
-                self.spec['sources'].pop(self.sources[self.source_index])
-                with open('saved/spec.json', 'w') as f:
-                    dump(self.spec, f)
+            with self.spec_service.edit() as spec:
+                if self.sources[self.source_index] in spec['sources']:
+                    spec['sources'].pop(self.sources[self.source_index])
+                elif self.sources[self.source_index].endswith('.sql'):
+                    spec.get('sql_sources', {}).pop(self.data_name(), None)
+                spec.get('compression', COMPRESSION)['sources'].pop(self.data_name(), None)
+                spec.get('source_state', {}).pop(self.sources[self.source_index], None)
             if self.sources[self.source_index] in listdir('saved/sources'):
                 remove('saved/sources/%s' % self.sources[self.source_index])
             self.sources.pop(self.source_index)
             self.existing_sources.removeItem(self.source_index)
 
 
+class SqlSource(QDialog):
+    def __init__(self, source_win:Source):
+        """
+        Add a SQL query as a primary data source,
+         saved in the spec and read in batches on each update.
+        :param source_win: Source window.
+        """
+        QDialog.__init__(self, parent=source_win)
+        # WINDOW DETAILS
+        self.setWindowTitle('Add SQL Data Source')
+        self.resize(300, 200)
+        # VARS
+        self.source_win = source_win
+        # SOURCE SETTINGS
+        self.info = QLabel('')
+        self.name = QLineEdit('Set Name')
+        self.backend = QComboBox(self)
+        self.backend.addItems(BACKENDS.keys())
+        self.database = QLineEdit('')
+        self.database.setPlaceholderText('SQLite File Path, or user@host/database')
+        self.password = QLineEdit('')
+        self.password.setPlaceholderText('Password')
+        self.password.setEchoMode(QLineEdit.EchoMode.Password)
+        self.query = QTextEdit('')
+        self.query.setPlaceholderText('SELECT * FROM table')
+        self.watermark = QLineEdit('')
+        self.watermark.setPlaceholderText('Watermark Column, Only Newer Rows Are Read On Update')
+        add_button = QPushButton('Add Source')
+        add_button.clicked.connect(lambda click: self.add_sql_source())
+        # MAIN LAYOUT
+        layout = QGridLayout(self)
+        layout.addWidget(self.info)
+        layout.addWidget(self.name)
+        layout.addWidget(self.backend)
+        layout.addWidget(self.database)
+        layout.addWidget(self.password)
+        layout.addWidget(self.query)
+        layout.addWidget(self.watermark)
+        layout.addWidget(add_button)
+        self.setLayout(layout)
+
+    def add_sql_source(self):
+        """
+        Save the SQL source to the spec file,
+         and list it with the primary sources as name.sql.
+        The password is only saved encrypted, so requires ENCRYPT_KEY to be set.
+        """
+        name = self.name.text().strip()
+        if not name or not self.database.text() or not self.query.toPlainText().strip():
+            self.info.setText('Name, Database and Query Are Required.')
+            return
+        password = ''
+        if self.password.text():
+            try:
+                password = Encrypt().encrypt_key(self.password.text())
+            except (ValueError, TypeError):
+                self.info.setText('Set ENCRYPT_KEY To Save A Password.')
+                return
+        source_win = self.source_win
+        with source_win.spec_service.edit() as spec:
+            spec.setdefault('sql_sources', {})[name] = dict(SQL_SOURCE, backend=self.backend.currentText(),
+                                                            database=self.database.text(), password=password,
+                                                            query=self.query.toPlainText().strip(),
+                                                            watermark=self.watermark.text().strip())
+            spec.get('source_state', {}).pop(name + '.sql', None)
+        source_win.spec_updated()
+        if name + '.sql' not in source_win.sources:
+            source_win.sources.append(name + '.sql')
+            source_win.existing_sources.addItem(name + '.sql')
+            source_win.update_data_action.setText('Update Data From New Sources')
+        source_win.existing_sources.setCurrentIndex(source_win.sources.index(name + '.sql'))
+        self.info.setText('')
+        self.close()
+
+
 class UpdateSources(QThread):
     error_occurred = pyqtSignal(Exception, name='ErrorInUpdate')
     finished = pyqtSignal()
@@ -207,11 +367,16 @@ class UpdateSources(QThread):
         Updates primary source data in a separate thread,
          for all existing sources in the sources folder,
          as well as internal sample sources.
+        Sources unchanged since their last update are skipped.
         :param main_window: Main Window.
         """
         super().__init__()
         self.main_window = main_window
         self.data_sources = []
+        self.source_state = {}
+        self.changed_state = {}
+        self.skipped = 0
+        self.refreshed = 0
 
     def run(self):
         """
@@ -223,10 +388,15 @@ class UpdateSources(QThread):
         Sends a list of any primary sources that fail,
          potentially due to not being in a csv or JSON format,
          and notifies user to verify the data is valid and correct format.
+        External sources are converted concurrently in a process pool,
+         sized by ingest_workers in the spec.
+        Worker processes are spawned rather than forked from this thread.
+        SQL sources are read last, streamed from their database.
         """
         self.progress.emit('1')
         self.update_sources()
         failed = []
+        external = [source for source in self.data_sources if not hasattr(source, 'internal')]
         for source in self.data_sources:
             if hasattr(source, 'internal'):
                 self.progress.emit('1')
@@ -235,34 +405,85 @@ class UpdateSources(QThread):
                 self.progress.emit('1')
                 source_data = source_func.update()
                 source_name = source_func.name
-                save_data_as_parquet(source_data, source_name)
-            else:
-                source_path = 'saved/sources/' + source
-                source_name = source[:source.rfind('.')]
+                save_data_as_parquet(source_data, source_name, self.main_window.spec)
+                self.refreshed += 1
+        workers = min(ingest_workers(self.main_window.spec), len(external))
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers, mp_context=get_context('spawn')) as pool:
+                futures = {pool.submit(ingest_source, source, self.main_window.spec): source for source in external}
+                for future in as_completed(futures):
+                    self.progress.emit('2')
+                    try:
+                        converted, error = future.result(), None
+                    except Exception as e:
+                        converted, error = [], e
+                    self.source_ingested(futures[future], converted, failed, error)
+        else:
+            for source in external:
                 self.progress.emit('1')
-                if source[source.rfind('.'):][:4] == '.csv':
-                    df = read_csv(source_path, na_filter=True, encoding=self.main_window.spec['sources'][source][1])
-                elif source[source.rfind('.'):][:5] == '.json':
-                    df = read_json(source_path, encoding=self.main_window.spec['sources'][source][1])
-                elif source[source.rfind('.'):][:4] == '.xls':
-                    df = read_excel(source_path, na_values='')
-                else:
-                    df = None
+                try:
+                    converted, error = ingest_source(source, self.main_window.spec), None
+                except Exception as e:
+                    converted, error = [], e
                 self.progress.emit('1')
-                if df is not None:
-                    source_data = {col: asarray(df[col],
-                                   dtype=type(np.datetime64(df[col][1]))
-                                   if type(df[col][0]) == Timestamp
-                                   else type(df[col][0]))
-                                   for col in df}
-                    save_data_as_parquet(source_data, source_name)
-                else:
-                    failed.append(source_name)
+                self.source_ingested(source, converted, failed, error)
+        self.update_sql_sources(failed)
         if failed:
-            self.progress.emit('failed %s' % failed)
+            self.progress.emit('failed %s' % '\n'.join(failed))
+        self.save_source_state()
+        self.progress.emit('refresh %s %s' % (self.skipped, self.refreshed))
         self.progress.emit('1')
         self.finished.emit()
 
+    def source_ingested(self, source:str, converted:list[str], failed:list[str], error:Exception=None):
+        """
+        Records the result of converting an external primary source.
+        Removes data of any workbook sheet that no longer exists.
+        :param source: Primary source file name.
+        :param converted: Names of the parquet data sources written, empty if it failed to convert.
+        :param failed: Names of sources that failed to convert, with the error raised if any.
+        :param error: Error raised converting the source, None if it did not raise.
+        """
+        if converted:
+            for data_name in set(self.source_state.get(source, {}).get('data', [])) - set(converted):
+                remove_data(data_name)
+            self.source_state[source] = dict(self.changed_state[source], data=converted)
+            self.refreshed += 1
+        else:
+            failed.append(self.failure(source[:source.rfind('.')], error))
+
+    def update_sql_sources(self, failed:list[str]):
+        """
+        Reads each SQL source saved in the spec in batches, through pooled connections.
+        Sources with a watermark column only read rows newer than their last update,
+         and are skipped if there are none.
+        :param failed: Names of sources that failed to update, with the error raised.
+        """
+        for name, source in self.main_window.spec.get('sql_sources', {}).items():
+            self.progress.emit('1')
+            try:
+                state = ingest_sql(name, source, self.main_window.spec, self.source_state.get(name + '.sql'))
+                if state is None:
+                    self.skipped += 1
+                else:
+                    self.source_state[name + '.sql'] = state
+                    self.refreshed += 1
+            except Exception as e:
+                failed.append(self.failure(name, e))
+            self.progress.emit('1')
+
+    def failure(self, name:str, error:Exception=None) -> str:
+        """
+        Describes a source that failed to update for the failure warning,
+         with the error raised so the cause is not lost.
+        :param name: Source name.
+        :param error: Error raised updating the source, None if it did not raise.
+        :return: Source name, followed by the error type and message if any.
+        """
+        if error is None:
+            return name
+        return '%s (%s: %s)' % (name, type(error).__name__, error)
+
     def get_prog(self, prog:int):
         """
         Passes current progress information
@@ -278,20 +499,60 @@ class UpdateSources(QThread):
          and copies them over to update saved primary source data.
         Sends a list of any primary sources that are no longer found at their given file path,
          and notifies user to manually reset the file paths.
+        Skips the copy and update of any source whose size, modified time or content hash,
+         and compression, are unchanged since its last update and whose data still exists.
+        Internal sample sources are only created if their data does not exist.
         """
         created_sources: Union[modules, TextIO] = [Game, IsoTriSurface, IsoWaveform, IsoPeaks, IsoSphere]
-        self.data_sources = created_sources
+        self.data_sources = [source for source in created_sources
+                             if not data_files(source.name)]
+        self.skipped = len(created_sources) - len(self.data_sources)
+        if self.skipped: self.progress.emit(str(self.skipped * 3))
+        self.source_state = dict(self.main_window.spec.get('source_state', {}))
         loc_error = []
         for source_name in listdir('saved/sources'):
             try:
                 if self.main_window.spec['sources'][source_name]:
                     source_file_path = self.main_window.spec['sources'][source_name][0]
-                    copyfile(source_file_path, Path('saved/sources/' + source_name).absolute())
-                    self.data_sources.append(source_name)
+                    previous = self.source_state.get(source_name)
+                    current = file_state(source_file_path, previous)
+                    data_name = source_name[:source_name.rfind('.')]
+                    current['codec'] = list(get_compression(self.main_window.spec, data_name))
+                    if self.source_unchanged(source_name, current, previous):
+                        self.source_state[source_name] = dict(current, data=previous.get('data', [data_name]))
+                        self.skipped += 1
+                        self.progress.emit('2')
+                    else:
+                        copyfile(source_file_path, Path('saved/sources/' + source_name).absolute())
+                        self.changed_state[source_name] = current
+                        self.data_sources.append(source_name)
             except (KeyError, FileNotFoundError):
                 loc_error.append(source_name)
         if loc_error: self.progress.emit('invalid %s' % loc_error)
 
+    def source_unchanged(self, source_name:str, current:dict, previous:Union[dict, None]) -> bool:
+        """
+        Checks if a primary source needs to be copied and updated again.
+        :param source_name: Primary source file name.
+        :param current: Current state of the primary source file.
+        :param previous: State recorded at its last update.
+        :return: True if content and compression are unchanged and all of its data exists,
+                 every sheet of a workbook.
+        """
+        if previous is None or previous.get('hash') != current['hash'] or previous.get('codec') != current['codec']:
+            return False
+        data_names = previous.get('data', [source_name[:source_name.rfind('.')]])
+        return (Path('saved/sources/' + source_name).exists()
+                and all(data_files(data_name) for data_name in data_names))
+
+    def save_source_state(self):
+        """
+        Records the state of updated primary sources in the spec,
+         locked against sources being added at the same time.
+        """
+        with self.main_window.spec_service.edit() as spec:
+            spec['source_state'] = self.source_state
+
 
 class WorkerSignals(QObject):
     """
@@ -303,14 +564,14 @@ class WorkerSignals(QObject):
 
 
 class UpdateSpecSource(QRunnable):
-    def __init__(self, mutex, source_name, source_file_path):
+    def __init__(self, spec_service, source_name, source_file_path):
         """
-        Thread pool object to update primary sources in the spec file.
-        :param mutex: Thread lock mechanism.
+        Thread pool object to update primary sources in the spec.
+        :param spec_service: Application spec service.
         :param source_file_path: Path to new sources.
         """
         super().__init__()
-        self.mutex = mutex
+        self.spec_service = spec_service
         self.source_name = source_name
         self.source_file_path = source_file_path
         self.root_dir = self.source_file_path[:self.source_file_path.rfind('/')]
@@ -319,30 +580,38 @@ class UpdateSpecSource(QRunnable):
         self.setAutoDelete(True)
         self.signals = WorkerSignals()
 
-    def detect_encoding(self):
-        """
-        Detect encoding of text in a given file.
-        :return: Text encoding type.
-        """
-        detector = universaldetector.UniversalDetector()
-        with open(self.source_file_path, 'rb') as file:
-            for line in file:
-                detector.feed(line)
-                if detector.done: break
-            detector.close()
-        return detector.result['encoding']
+    def detect_encoding(self, spec:dict) -> tuple[str, Union[str, None]]:
+        """
+        Detect encoding of text in the new source,
+         reusing the encoding found for a file with the same sampled bytes.
+        Only the sample is read, never the whole file.
+        Runs without holding the spec lock, the result is cached by the caller.
+        :param spec: Copy of the encoding_sample and encodings spec settings.
+        :return: Sample hash and text encoding type.
+        """
+        sample = int(spec.get('encoding_sample', ENCODING_SAMPLE))
+        key = sample_hash(self.source_file_path, sample)
+        encoding = spec.get('encodings', {}).get(key)
+        if encoding is None:
+            encoding = detect_encoding(self.source_file_path, sample)
+        return key, encoding
 
     def run(self):
         """
-        Locks thread while updating spec file with new sources.
+        Adds the new source to the spec, detecting its encoding without holding the spec lock,
+         from a copy of the settings it needs taken under the lock, as other threads change the spec meanwhile.
         Updates primary sources root directory if a new source is added.
-        """
-        self.mutex.lock()
-        with open('saved/spec.json', 'r') as f: spec = load(f)
-        add_source = self.source_name not in spec['sources']
-        if self.root_dir: spec['source_dir'] = self.root_dir
-        if add_source: spec['sources'][self.source_name] = (self.source_file_path, self.detect_encoding())
-        if self.root_dir or add_source:
-            with open('saved/spec.json', 'w') as f: dump(spec, f)
-        self.signals.fin.emit()
-        self.mutex.unlock()
\ No newline at end of file
+        Writes are batched by the spec service, so adding many sources writes the spec once.
+        """
+        with self.spec_service.lock:
+            spec = self.spec_service.spec
+            add_source = self.source_name not in spec['sources']
+            settings = {'encoding_sample': spec.get('encoding_sample', ENCODING_SAMPLE),
+                        'encodings': dict(spec.get('encodings', {}))}
+        if add_source: sample_key, encoding = self.detect_encoding(settings)
+        with self.spec_service.edit() as spec:
+            if self.root_dir: spec['source_dir'] = self.root_dir
+            if add_source:
+                spec.setdefault('encodings', {})[sample_key] = encoding
+                spec['sources'][self.source_name] = (self.source_file_path, encoding)
+        self.signals.fin.emit()
\ No newline at end of file
@@ -0,0 +1,87 @@
+from contextlib import contextmanager
+from json import load, dumps
+from os import replace, fsync
+from threading import RLock
+from typing import Union
+
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+
+"""
+Milliseconds without changes before the spec is written,
+ so a batch of changes is saved in a single write.
+"""
+SPEC_WRITE_DELAY = 500
+
+
+class SpecService(QObject):
+    changed = pyqtSignal()
+    def __init__(self, path:str='saved/spec.json', delay:int=SPEC_WRITE_DELAY):
+        """
+        Single in-memory copy of the application spec,
+         shared by every window and thread instead of each reading and writing the file.
+        Changes are written after a quiet period,
+         to a temporary file renamed over the spec so it is never left part written.
+        :param path: Path to spec file.
+        :param delay: Milliseconds without changes before writing.
+        """
+        super().__init__()
+        self.path = path
+        self.lock = RLock()
+        with open(path, 'r') as f:
+            self.spec:dict = load(f)
+        self.dirty = False
+        self.writes = 0
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(delay)
+        self.timer.timeout.connect(self.flush)
+        self.changed.connect(self.timer.start)
+
+    @contextmanager
+    def edit(self):
+        """
+        Lock the spec for a change from any thread,
+         and schedule it to be written once changes stop.
+        :return: Spec dictionary.
+        """
+        with self.lock:
+            yield self.spec
+            self.dirty = True
+        self.changed.emit()
+
+    def save(self):
+        """
+        Schedule a write of changes already made to the spec dictionary.
+        """
+        with self.edit():
+            pass
+
+    def flush(self):
+        """
+        Write the spec if it has changed, to a temporary file renamed over the spec file.
+        """
+        with self.lock:
+            if not self.dirty:
+                return
+            self.dirty = False
+            temp = self.path + '.tmp'
+            with open(temp, 'w') as f:
+                f.write(dumps(self.spec))
+                f.flush()
+                fsync(f.fileno())
+            replace(temp, self.path)
+            self.writes += 1
+
+
+SERVICE:Union[SpecService, None] = None
+
+
+def spec_service() -> SpecService:
+    """
+    The application's spec service, created on first use.
+    :return: SpecService.
+    """
+    global SERVICE
+    if SERVICE is None:
+        SERVICE = SpecService()
+    return SERVICE
@@ -1,35 +1,291 @@
-import mysql.connector
-from mysql.connector import Error
+from contextlib import contextmanager
+from hashlib import sha256
+from itertools import chain
+from json import dumps
+from queue import Queue, Empty
+from sqlite3 import connect as sqlite_connect
+from threading import Lock
+from typing import Union
+
+from pyarrow import Array, ArrowInvalid, ArrowTypeError, RecordBatch, Schema, array, types, string, unify_schemas
+from pyarrow.compute import max as column_max
+
+from resources.modules.data import data_files, source_schema, parquet_row_groups
+from resources.modules.ingest import write_stream
+from resources.modules.utility import get_compression, Encrypt
 
 """
-Currently unused, will apply as an option to connect to a SQL database in the future.
+Connections held open to each database.
 """
-def create_connection(host_name='localhost', user_name='root', user_password='', db_name=''):
-    connection = None
-    try:
-        connection = mysql.connector.connect(
-            host=host_name,
-            user=user_name,
-            passwd=user_password,
-            database=db_name
-        )
-        print("Connection to MySQL DB successful")
-    except Error as e:
-        print(f"The error '{e}' occurred")
-    return connection
-
-def execute_read_query(connection, query):
-    cursor = connection.cursor()
-    result = None
+POOL_SIZE = 4
+
+"""
+Rows fetched from a cursor per record batch.
+"""
+FETCH_SIZE = 50_000
+
+"""
+Batches held back while a column has only held nulls, waiting for a value to type it by.
+Columns with no values in that many batches are read as strings.
+"""
+NULL_BATCHES = 8
+
+"""
+Base SQL source structure, saved by name under sql_sources in the spec.
+"""
+SQL_SOURCE = {'backend': 'sqlite',        # backend name in BACKENDS.
+              'database': '',  # sqlite file path, or user@host/database.
+              'password': '',   # password encrypted with Encrypt, if any.
+              'query': '',                         # select statement.
+              'watermark': ''}  # increasing column for refresh, if any.
+
+
+def connect_sqlite(source:dict):
+    """
+    Open a connection to a local SQLite database file.
+    Shared between threads through a pool, never used by two at once.
+    :param source: SQL source settings.
+    :return: SQLite connection.
+    """
+    return sqlite_connect(source['database'], check_same_thread=False)
+
+
+def connect_mysql(source:dict):
+    """
+    Open a connection to a MySQL database, from user@host/database.
+    mysql-connector is only needed if a MySQL source is used.
+    :param source: SQL source settings.
+    :return: MySQL connection.
+    """
+    import mysql.connector
+    user, _, address = source['database'].rpartition('@')
+    host, _, database = address.partition('/')
+    password = Encrypt().decrypt_key(source['password']) if source.get('password') else ''
+    return mysql.connector.connect(host=host, user=user or 'root', passwd=password, database=database)
+
+
+"""
+Connection function, query parameter marker and identifier quote of each SQL backend.
+"""
+BACKENDS = {'sqlite': (connect_sqlite, '?', '"'),
+            'mysql': (connect_mysql, '%s', '`')}
+
+
+class ConnectionPool:
+    def __init__(self, source:dict, size:int=POOL_SIZE):
+        """
+        Pool of open connections to a single database,
+         reused between queries and updates instead of reconnecting.
+        :param source: SQL source settings.
+        :param size: Maximum connections held open.
+        """
+        self.source = source
+        self.idle = Queue(maxsize=size)
+        self.open = 0
+        self.size = size
+        self.lock = Lock()
+
+    @contextmanager
+    def connection(self):
+        """
+        Borrow a connection, opened if none are idle and the pool is not full,
+         otherwise waits for one to be returned.
+        A connection that fails, or is left part way through a query, is closed instead of returned.
+        :return: Database connection.
+        """
+        try:
+            conn = self.idle.get_nowait()
+        except Empty:
+            with self.lock:
+                create = self.open < self.size
+                if create: self.open += 1
+            if create:
+                try:
+                    conn = BACKENDS[self.source['backend']][0](self.source)
+                except Exception:
+                    with self.lock: self.open -= 1
+                    raise
+            else:
+                conn = self.idle.get()
+        returned = False
+        try:
+            yield conn
+            returned = True
+        finally:
+            if returned:
+                self.idle.put(conn)
+            else:
+                conn.close()
+                with self.lock: self.open -= 1
+
+
+POOLS: dict[tuple, ConnectionPool] = {}
+POOLS_LOCK = Lock()
+
+
+def get_pool(source:dict) -> ConnectionPool:
+    """
+    Connection pool of a SQL source's database, shared by every source using it.
+    :param source: SQL source settings.
+    :return: ConnectionPool.
+    """
+    key = (source['backend'], source['database'], source.get('password', ''))
+    with POOLS_LOCK:
+        if key not in POOLS:
+            POOLS[key] = ConnectionPool(source)
+        return POOLS[key]
+
+
+def sql_batches(source:dict, query:str, params:list, batch_schema:Schema=None, fetch_size:int=FETCH_SIZE):
+    """
+    Run a query on a pooled connection,
+     fetching rows in batches from the cursor rather than all at once.
+    Column types are taken from the first batches unless a schema is given,
+     batches are held back until every column has held a value, up to NULL_BATCHES.
+    Integer columns holding decimals in any held batch are read as floats.
+    A query without rows gives one empty batch, its columns read as strings.
+    :param source: SQL source settings.
+    :param query: Select statement.
+    :param params: Query parameters.
+    :param batch_schema: Schema to convert every batch to.
+    :param fetch_size: Rows per batch.
+    :return: Generator of record batches.
+    """
+    with get_pool(source).connection() as conn:
+        cursor = conn.cursor()
+        try:
+            cursor.execute(query, params)
+            names = [column[0] for column in cursor.description]
+            held, typed = [], set()
+            while rows := cursor.fetchmany(fetch_size):
+                columns = list(zip(*rows))
+                if batch_schema is None:
+                    held.append(RecordBatch.from_arrays([array(column) for column in columns], names))
+                    typed |= {i for i, col in enumerate(held[-1].schema) if not types.is_null(col.type)}
+                    if len(held) < NULL_BATCHES and len(typed) < len(names):
+                        continue
+                    batch_schema = settled_schema(held)
+                    yield from (cast_batch(batch, batch_schema) for batch in held)
+                    held = []
+                else:
+                    yield RecordBatch.from_arrays([typed_array(column, col_field.type)
+                                                   for column, col_field in zip(columns, batch_schema)],
+                                                  schema=batch_schema)
+            if held:
+                batch_schema = settled_schema(held)
+                yield from (cast_batch(batch, batch_schema) for batch in held)
+            elif batch_schema is None:
+                yield RecordBatch.from_arrays([array([], type=string()) for _ in names], names)
+        finally:
+            try:
+                cursor.close()
+            except Exception:
+                pass
+
+
+def settled_schema(batches:list[RecordBatch]) -> Schema:
+    """
+    Schema of a query from its first batches,
+     each column typed by the batches holding values in it.
+    Columns with no values are read as strings.
+    :param batches: First record batches of a query.
+    :return: Schema to convert every batch to.
+    """
+    batch_schema = unify_schemas([batch.schema for batch in batches], promote_options='permissive')
+    for i, col_field in enumerate(batch_schema):
+        if types.is_null(col_field.type):
+            batch_schema = batch_schema.set(i, col_field.with_type(string()))
+    return batch_schema
+
+
+def cast_batch(batch:RecordBatch, batch_schema:Schema) -> RecordBatch:
+    """
+    Convert a record batch to a settled schema.
+    :param batch: Record batch with the types of its own values.
+    :param batch_schema: Schema to convert to.
+    :return: Record batch.
+    """
+    return RecordBatch.from_arrays([column.cast(col_field.type)
+                                    for column, col_field in zip(batch.columns, batch_schema)], schema=batch_schema)
+
+
+def typed_array(column:tuple, data_type) -> Array:
+    """
+    Arrow array of a column of fetched values in a settled type.
+    Values of a string column that are not strings,
+     in a column typed before it held any values, are read as their string form.
+    :param column: Fetched values.
+    :param data_type: Arrow type of the column.
+    :return: Arrow array.
+    """
     try:
-        cursor.execute(query)
-        result = cursor.fetchall()
-    except Error as e:
-        print(f"The error '{e}' occurred")
-    return result
-
-connect = create_connection("localhost", "root", "")
-select_users = "SELECT * FROM users"
-users = execute_read_query(connect, select_users)
-for user in users:
-    print(user)
\ No newline at end of file
+        return array(column, type=data_type)
+    except (ArrowInvalid, ArrowTypeError):
+        if not types.is_string(data_type):
+            raise
+        return array([value if value is None else str(value) for value in column], type=data_type)
+
+
+def source_key(source:dict) -> str:
+    """
+    Hash of what a SQL source selects, so a changed query is read again in full.
+    :param source: SQL source settings.
+    :return: SHA-256 hex digest.
+    """
+    return sha256(dumps([source['backend'], source['database'], source['query'], source.get('watermark', '')])
+                  .encode()).hexdigest()
+
+
+def ingest_sql(name:str, source:dict, spec:dict, previous:Union[dict, None]) -> Union[dict, None]:
+    """
+    Write a SQL source to parquet, streamed in batches from the cursor.
+    With a watermark column, only rows past the last recorded watermark are fetched,
+     and appended to the existing data by rewriting it row group by row group.
+    :param name: SQL source name, also its data source name.
+    :param source: SQL source settings.
+    :param spec: Application spec dictionary.
+    :param previous: State recorded at its last update.
+    :return: New state of the source, None if no rows were added since its last update.
+    """
+    _, marker, quote = BACKENDS[source['backend']]
+    watermark = source.get('watermark', '')
+    state = {'key': source_key(source), 'codec': list(get_compression(spec, name)), 'data': [name]}
+    incremental = (watermark and previous and data_files(name) and previous.get('watermark') is not None
+                   and all(previous.get(key) == state[key] for key in ('key', 'codec')))
+    state['watermark'] = previous.get('watermark') if incremental else None
+    if incremental:
+        existing = source_schema(name)
+        new = sql_batches(source, 'SELECT * FROM (%s) AS source WHERE %s%s%s > %s' % (
+            source['query'].rstrip().rstrip(';'), quote, watermark, quote, marker),
+                          [previous['watermark']], existing)
+        first = next(new, None)
+        if first is None:
+            return None
+        batches = chain((batch for table in parquet_row_groups(name) for batch in table.to_batches()),
+                        track_watermark(chain([first], new), watermark, state))
+        write_stream(batches, existing, name, spec)
+    else:
+        batches = sql_batches(source, source['query'], [])
+        if watermark:
+            batches = track_watermark(batches, watermark, state)
+        write_stream(batches, None, name, spec)
+    return state
+
+
+def track_watermark(batches, watermark:str, state:dict):
+    """
+    Pass batches through, recording the highest watermark value seen in the state.
+    Values are compared as their own type,
+     and recorded as JSON types, others as their string form.
+    :param batches: Iterable of record batches.
+    :param watermark: Watermark column name.
+    :param state: SQL source state to record in.
+    :return: Generator of record batches.
+    """
+    highest = None
+    for batch in batches:
+        value = column_max(batch.column(batch.schema.get_field_index(watermark))).as_py()
+        if value is not None and (highest is None or value > highest):
+            highest = value
+            state['watermark'] = value if isinstance(value, (int, float, str)) else str(value)
+        yield batch
@@ -0,0 +1,168 @@
+from json import dumps, loads
+from os import makedirs, replace, remove
+from pathlib import Path
+
+import numpy as np
+from pandas.util import hash_array
+from pyarrow import Schema, Table, types
+from pyarrow.compute import min_max, less_equal, all as all_true
+
+from resources.modules.data import parquet_version
+
+"""
+Smallest value hashes kept per column to estimate its distinct count,
+ exact below this many distinct values, within about 2% above it.
+"""
+DISTINCT_SKETCH = 4096
+
+
+class ColumnStats:
+    def __init__(self):
+        """
+        Running min, max, null count, approximate distinct count and sortedness of a column,
+         updated a batch at a time so sources are measured as they are written.
+        Distinct values are counted with a k minimum values sketch of their hashes.
+        """
+        self.min = None
+        self.max = None
+        self.nulls = 0
+        self.sorted = True
+        self.last = None
+        self.hashes = np.array([], dtype=np.uint64)
+
+    def update(self, column):
+        """
+        Add a batch of a column.
+        :param column: Arrow array or chunked array.
+        """
+        self.nulls += column.null_count
+        values = column.drop_null()
+        if len(values) == 0:
+            return
+        if types.is_dictionary(values.type):
+            values = values.cast(values.type.value_type)
+        if types.is_nested(values.type) or types.is_binary(values.type):
+            self.sorted = False
+            return
+        bounds = min_max(values)
+        low, high = bounds['min'].as_py(), bounds['max'].as_py()
+        self.min = low if self.min is None else min(self.min, low)
+        self.max = high if self.max is None else max(self.max, high)
+        if self.sorted:
+            first = values[0].as_py()
+            self.sorted = ((self.last is None or self.last <= first)
+                           and (len(values) < 2 or all_true(less_equal(values[:-1], values[1:])).as_py()))
+            self.last = values[-1].as_py()
+        hashes = hash_array(np.asarray(values.unique()))
+        self.hashes = np.unique(np.concatenate([self.hashes, hashes]))[:DISTINCT_SKETCH]
+
+    def distinct(self) -> int:
+        """
+        Estimated distinct count of non null values.
+        :return: Distinct count.
+        """
+        if len(self.hashes) < DISTINCT_SKETCH:
+            return len(self.hashes)
+        return int((DISTINCT_SKETCH - 1) / (float(self.hashes[-1]) / 2 ** 64))
+
+    def to_dict(self) -> dict:
+        """
+        Stats as JSON types, values that are not numbers or strings are kept as their string form.
+        :return: Stats dictionary.
+        """
+        def value(v):
+            return v if v is None or isinstance(v, (bool, int, float, str)) else str(v)
+        return {'min': value(self.min), 'max': value(self.max), 'nulls': self.nulls,
+                'distinct': self.distinct(), 'sorted': self.sorted}
+
+
+class TableStats:
+    def __init__(self, table_schema:Schema):
+        """
+        Column stats of a data source, collected from the batches written to it.
+        :param table_schema: Schema of the data source.
+        """
+        self.columns = {name: ColumnStats() for name in table_schema.names}
+        self.rows = 0
+
+    def update(self, batch):
+        """
+        Add a record batch or table.
+        :param batch: Record batch or table of the data source.
+        """
+        self.rows += batch.num_rows
+        for name, column in self.columns.items():
+            column.update(batch.column(name))
+
+    def to_dict(self) -> dict[str, dict]:
+        """
+        :return: Column names with their stats.
+        """
+        return {name: column.to_dict() for name, column in self.columns.items()}
+
+
+def stats_path(name:str) -> Path:
+    """
+    Path of the column stats sidecar of a parquet data source.
+    :param name: Name of parquet data source without file extension.
+    :return: Path.
+    """
+    return Path('saved/cache/%s.stats.json' % name)
+
+
+def write_stats(name:str, stats:TableStats):
+    """
+    Save the column stats of a parquet data source,
+     stamped with the version of the parquet they were collected from.
+    :param name: Name of parquet data source without file extension.
+    :param stats: Collected stats of everything written to it.
+    """
+    makedirs('saved/cache', exist_ok=True)
+    path = stats_path(name)
+    temp = str(path) + '.tmp'
+    try:
+        with open(temp, 'w') as f:
+            f.write(dumps({'version': parquet_version(name).decode(), 'rows': stats.rows,
+                           'columns': stats.to_dict()}))
+        replace(temp, path)
+    except OSError:
+        if Path(temp).exists():
+            remove(temp)
+
+
+def table_stats(name:str, table:Table):
+    """
+    Collect and save the column stats of a table written to a parquet data source.
+    :param name: Name of parquet data source without file extension.
+    :param table: Table written to the parquet data source.
+    """
+    stats = TableStats(table.schema)
+    stats.update(table)
+    write_stats(name, stats)
+
+
+def read_stats(name:str) -> dict[str, dict]:
+    """
+    Column stats of a parquet data source, if saved for its current version.
+    :param name: Name of parquet data source without file extension.
+    :return: Column names with their stats, empty if there are none.
+    """
+    try:
+        with open(stats_path(name), 'r') as f:
+            saved = loads(f.read())
+        if saved.get('version') != parquet_version(name).decode():
+            return {}
+    except (OSError, ValueError):
+        return {}
+    return saved['columns']
+
+
+def remove_stats(name:str):
+    """
+    Delete the column stats of a parquet data source, if there are any.
+    :param name: Name of parquet data source without file extension.
+    """
+    try:
+        remove(stats_path(name))
+    except OSError:
+        pass
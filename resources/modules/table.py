@@ -3,18 +3,22 @@ from copy import deepcopy
 from PyQt6.QtCore import Qt, QAbstractTableModel
 from PyQt6.QtGui import QColor
 from numpy import int64, interp
-from pandas import DataFrame, isna
+from pandas import DataFrame, isna, CategoricalDtype
 
 
 class TableModel(QAbstractTableModel):
-    def __init__(self, data):
+    def __init__(self, data, source=None):
         """
         Define parameters for color coding.
         Restructure dictionary into flattened Dataframe if needed.
+        Columns missing from data are read from the source,
+         only once the table view displays them.
         :param data: Panda Dataframe or dictionary of Numpy arrays
+        :param source: LazySource of the data, if only some of its columns are loaded.
         """
         super().__init__()
         self._data = deepcopy(data)
+        self.source = source
         self.colors = [QColor(0, 255, 255, 100), QColor(0, 231, 255, 100), QColor(0, 206, 255, 100),
                        QColor(0, 181, 255, 100), QColor(0, 157, 255, 100), QColor(0, 132, 255, 100),
                        QColor(0, 108, 255, 100), QColor(0, 84, 255, 100), QColor(0, 59, 255, 100),
@@ -26,8 +30,39 @@ class TableModel(QAbstractTableModel):
             for col in self._data:
                 self._data[col] = self._data[col].reshape(-1)
             self._data = DataFrame(self._data)
-        self.colors_min = [self._data[col][self._data[col].idxmin()] for col in self._data]
-        self.colors_max = [self._data[col][self._data[col].idxmax()] for col in self._data]
+        self.columns = self.source.columns if self.source is not None else list(self._data.columns)
+        self.rows = self.source.rows if self.source is not None else self._data.shape[0]
+        self.colors_min = {}
+        self.colors_max = {}
+
+    def column(self, section:int):
+        """
+        Get a column of the table data,
+         reading it from the source the first time it is displayed.
+        Sets the color coding range of the column,
+         from the stats saved with its source when there are any.
+        :param section: Index of the column.
+        :return: Pandas Series of column data.
+        """
+        name = self.columns[section]
+        if name not in self._data:
+            loaded = self.source.load([name])
+            if self._data.columns.empty:
+                self._data = loaded
+            else:
+                self._data[name] = loaded[name]
+        if name not in self.colors_min:
+            col = self._data[name]
+            low = high = None
+            if isinstance(col.dtype, CategoricalDtype):
+                col = col.cat.codes
+            elif self.source is not None:
+                low, high = self.source.column_stat(name, 'min'), self.source.column_stat(name, 'max')
+            if low is None or high is None:
+                low, high = col[col.idxmin()], col[col.idxmax()]
+            self.colors_min[name] = low
+            self.colors_max[name] = high
+        return self._data[name]
 
     def data(self, index, role=...):
         """
@@ -37,15 +72,15 @@ class TableModel(QAbstractTableModel):
         :return: Data value at index.
         """
         if role == Qt.ItemDataRole.DisplayRole:
-            value = self._data.iloc[index.row(), index.column()]
+            value = self.column(index.column()).iloc[index.row()]
             if isna(value):
                 value = ''
             return str(value)
         if role == Qt.ItemDataRole.BackgroundRole:
-            value = self._data.iloc[index.row(), index.column()]
+            value = self.column(index.column()).iloc[index.row()]
             if (isinstance(value, int) or isinstance(value, float) or isinstance(value, int64)) and not isna(value):
-                min_col_val = self.colors_min[index.column()]
-                max_col_val = self.colors_max[index.column()]
+                min_col_val = self.colors_min[self.columns[index.column()]]
+                max_col_val = self.colors_max[self.columns[index.column()]]
                 value = int(interp(value, [min_col_val, max_col_val], [0, 20]))
                 return self.colors[value]
 
@@ -55,7 +90,7 @@ class TableModel(QAbstractTableModel):
         :param parent: Unused.
         :return: Number of rows.
         """
-        return self._data.shape[0]
+        return self.rows
 
     # def columnCount(self, index):
     def columnCount(self, parent=...):
@@ -64,7 +99,7 @@ class TableModel(QAbstractTableModel):
         :param parent: Unused.
         :return: Number of columns.
         """
-        return self._data.shape[1]
+        return len(self.columns)
 
     def headerData(self, section, orientation, role=...):
         """
@@ -76,6 +111,6 @@ class TableModel(QAbstractTableModel):
         """
         if role == Qt.ItemDataRole.DisplayRole:
             if orientation == Qt.Orientation.Horizontal:
-                return str(self._data.columns[section])
+                return str(self.columns[section])
             if orientation == Qt.Orientation.Vertical:
-                return str(self._data.index[section])
\ No newline at end of file
+                return str(self._data.index[section]) if section < len(self._data.index) else str(section)
\ No newline at end of file
@@ -1,8 +1,10 @@
 import sys
 from ast import literal_eval
+from codecs import getincrementaldecoder, BOM_UTF8
 from copy import deepcopy
+from hashlib import sha256
 from io import StringIO
-from json import dump, loads, load, dumps, JSONEncoder
+from json import dump, loads, load, dumps
 from os import listdir, path, getenv
 from pathlib import Path
 from time import sleep
@@ -10,14 +12,19 @@ from typing import Union
 
 from PyQt6.QtCore import QThread, pyqtSignal
 from PyQt6.QtWidgets import QMessageBox
+from chardet import universaldetector
 from cryptography.fernet import Fernet
-from numpy import array, ndarray
-from pandas import DataFrame
-from pandas import read_json
-from pyarrow import schema, field, from_numpy_dtype, Table
-from pyarrow.parquet import write_table
+from numpy import array, dtype as np_dtype
+from pandas import read_json, DataFrame, ArrowDtype
+from pandas.api.types import infer_dtype
+from pyarrow import (schema, field, from_numpy_dtype, Table, Array, Schema, ArrowException,
+                     string, binary, bool_, int64, float64, timestamp, date32)
 
-from resources.modules.plot_map import PlotMap
+from resources.modules.data import (write_cache, write_source, load_data, data_reference,
+                                    ROW_GROUP_ROWS, DATASET_FILE_ROWS)
+from resources.modules.plot_map import PlotMap, PlotMapPlaceholder
+from resources.modules.spec import spec_service
+from resources.modules.stats import table_stats
 
 """
 Predefined colors list
@@ -40,10 +47,49 @@ PLOT = {'id': 0,                                     # plot map identifier.
         'dpi': 100,                          # plot font size / resolution.
         'fit': False,                    # fit plot to window or expandable.
         'label_all': False,          # show all plot point labels on graph.
+        'decimate': True,     # draw line plots with rows visible at width.
+        'density': 'mean',     # aggregate of large scatter density images.
         'horz_stretch': 0, # expand plot horizontally by factor of * / 10.
         'vert_stretch': 0,   # expand plot vertically by factor of * / 10.
         'data_name': '',          # source name of dataframe with prefixes.
         'data': None}           # pandas dataframe or dict of numpy arrays.
+                         # saved as reference to data source name, version.
+
+"""
+Parquet compression codecs available for saved data,
+ with their default compression level if they accept one.
+"""
+CODECS = {'zstd': 3, 'lz4': None, 'snappy': None, 'gzip': 6, 'none': None}
+
+"""
+Bytes of a new source sampled to detect its text encoding.
+"""
+ENCODING_SAMPLE = 1 << 20
+
+"""
+String columns are saved dictionary encoded,
+ and loaded as categorical,
+ if their distinct values are at most this fraction of their rows,
+ and no more than DICTIONARY_MAX_UNIQUE.
+"""
+DICTIONARY_RATIO = 0.5
+DICTIONARY_MAX_UNIQUE = 1 << 16
+
+"""
+Arrow types of object columns, by the type Pandas infers from their values.
+Object columns of any other kind are saved as strings.
+"""
+OBJECT_TYPES = {'string': string(), 'empty': string(), 'bytes': binary(), 'boolean': bool_(), 'integer': int64(),
+                'floating': float64(), 'mixed-integer-float': float64(), 'datetime': timestamp('ns'),
+                'datetime64': timestamp('ns'), 'date': date32()}
+
+"""
+Base spec compression structure.
+Workspace codec and level, with overrides keyed by data source name.
+"""
+COMPRESSION = {'codec': 'zstd',                          # workspace codec.
+               'level': CODECS['zstd'],          # workspace codec level.
+               'sources': {}}         # data name: {'codec': , 'level': }.
 
 def error_func(in_txt, func, *args, **kwargs):
     """
@@ -76,82 +122,335 @@ def resource_path(relative_path: str) -> str:
         base_path = path.abspath("")
     return path.join(base_path, relative_path)
 
-def save_data_as_parquet(source_data, source_name):
+def file_hash(file_path:str) -> str:
+    """
+    Content hash of a file, read in blocks.
+    :param file_path: Path to file.
+    :return: SHA-256 hex digest.
+    """
+    digest = sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def file_state(file_path:str, previous:dict=None) -> dict:
+    """
+    Size, modified time and content hash of a file.
+    The hash is reused from the previous state if size and modified time are unchanged.
+    :param file_path: Path to file.
+    :param previous: Previously recorded state of the file.
+    :return: Dict of size, mtime and hash.
+    """
+    stat = Path(file_path).stat()
+    state = {'size': stat.st_size, 'mtime': stat.st_mtime_ns}
+    if previous and previous.get('size') == state['size'] and previous.get('mtime') == state['mtime']:
+        state['hash'] = previous['hash']
+    else:
+        state['hash'] = file_hash(file_path)
+    return state
+
+def sample_hash(file_path:str, sample:int=ENCODING_SAMPLE) -> str:
+    """
+    Hash of the bytes encoding detection reads from a file,
+     so its detected encoding can be reused without reading the whole file.
+    Includes one byte past the sample, as a file ending within the sample is detected differently.
+    :param file_path: Path to file.
+    :param sample: Maximum number of bytes read by detect_encoding.
+    :return: SHA-256 hex digest.
+    """
+    with open(file_path, 'rb') as file:
+        return sha256(file.read(sample + 1)).hexdigest()
+
+def detect_encoding(file_path:str, sample:int=ENCODING_SAMPLE) -> Union[str, None]:
+    """
+    Detect encoding of text in a given file, from at most a sample of its first bytes.
+    Text that decodes as strict UTF-8 is accepted without running chardet.
+    :param file_path: Path to file.
+    :param sample: Maximum number of bytes read.
+    :return: Text encoding type, None if undetected.
+    """
+    with open(file_path, 'rb') as file:
+        head = file.read(sample)
+    if head.startswith(BOM_UTF8):
+        return 'utf-8-sig'
+    try:
+        getincrementaldecoder('utf-8')('strict').decode(head, final=len(head) < sample)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        pass
+    detector = universaldetector.UniversalDetector()
+    for line in head.splitlines(keepends=True):
+        detector.feed(line)
+        if detector.done: break
+    detector.close()
+    return detector.result['encoding']
+
+def get_compression(spec:dict, source_name:str) -> tuple[str, Union[int, None]]:
+    """
+    Obtain the parquet codec and level to write a data source with,
+     from its own setting in the spec if it has one,
+     otherwise from the workspace setting.
+    :param spec: Application spec dictionary.
+    :param source_name: Data source name, without file extension.
+    :return: Codec name and compression level, None if codec has no levels.
+    """
+    compression = spec.get('compression', COMPRESSION)
+    setting = compression.get('sources', {}).get(source_name, compression)
+    codec = setting.get('codec', COMPRESSION['codec'])
+    if codec not in CODECS:
+        codec = COMPRESSION['codec']
+    level = setting.get('level', CODECS[codec]) if CODECS[codec] is not None else None
+    return codec, level
+
+def low_cardinality(distinct:int, rows:int) -> bool:
+    """
+    Whether a string column repeats its values enough to be dictionary encoded.
+    :param distinct: Number of distinct values in column.
+    :param rows: Number of rows in column.
+    :return: True if column should be dictionary encoded.
+    """
+    return distinct <= min(DICTIONARY_MAX_UNIQUE, rows * DICTIONARY_RATIO)
+
+def typed_frame(frame:DataFrame) -> DataFrame:
+    """
+    Prepare a Dataframe to be saved with a schema from its dtypes.
+    Low cardinality string columns become categorical,
+     object columns of mixed values become strings, keeping missing values.
+    The original Dataframe is not modified.
+    :param frame: Pandas Dataframe.
+    :return: Shallow copy of Dataframe with string column names.
+    """
+    frame = frame.copy(deep=False)
+    frame.columns = [str(column) for column in frame.columns]
+    for column in frame:
+        if frame[column].dtype != object:
+            continue
+        kind = infer_dtype(frame[column], skipna=True)
+        if kind not in OBJECT_TYPES:
+            frame[column] = frame[column].where(frame[column].isna(), frame[column].astype(str))
+            kind = 'string'
+        if kind == 'string' and low_cardinality(frame[column].nunique(), len(frame[column])):
+            frame[column] = frame[column].astype('category')
+    return frame
+
+def frame_schema(frame:DataFrame) -> Schema:
+    """
+    Arrow schema of a Dataframe, taken from the dtype of each column,
+     not from its first value.
+    Object columns use the type Pandas infers from all of their non missing values,
+     categorical columns are dictionary encoded,
+     Arrow-backed columns keep their Arrow type so they are written without converting.
+    :param frame: Pandas Dataframe from typed_frame.
+    :return: Arrow schema.
+    """
+    fields = []
+    for column in frame:
+        column_type = frame[column].dtype
+        if column_type == object:
+            arrow_type = OBJECT_TYPES.get(infer_dtype(frame[column], skipna=True), string())
+        elif isinstance(column_type, np_dtype):
+            arrow_type = from_numpy_dtype(column_type)
+        elif isinstance(column_type, ArrowDtype):
+            arrow_type = column_type.pyarrow_dtype
+        else:
+            arrow_type = Array.from_pandas(frame[column].iloc[:0]).type
+        fields.append(field(column, arrow_type))
+    return schema(fields)
+
+def save_data_as_parquet(source_data, source_name, spec:dict=None, compression_name:str=None):
     """
     Creates parquets of internally created sample data.
     Converts primary source data from csv to parquet format,
      grabs shape if multidimensional and flatten as necessary.
-    :param source_data: Primary source data csv.
+    Multidimensional columns keep their shape in their own field metadata,
+     and are written as a single row group so they load back without copying.
+    Shape and type are taken once per column from the array itself,
+     no individual rows are inspected.
+    Dataframes are saved with a schema from their dtypes,
+     low cardinality string columns dictionary encoded.
+    Flat data is written in row groups of ROW_GROUP_ROWS, sorted by its sort_by column in the spec if it has one,
+     and as a partitioned dataset if it has more than dataset_file_rows rows.
+    Column stats are saved alongside, so they are not recomputed from the data when rendering.
+    :param source_data: Primary source data, Dataframe or dictionary of Numpy arrays.
     :param source_name: Primary source data name.
+    :param spec: Application spec, from the spec service if not given.
+                 Also writes a memory mappable Arrow IPC cache, unless spec ipc_cache is False.
+    :param compression_name: Data source name to take the compression setting from,
+                             source_name if not given.
+    """
+    if spec is None:
+        spec = spec_service().spec
+    codec, level = get_compression(spec, compression_name or source_name)
+    row_group_size = None
+    if isinstance(source_data, DataFrame):
+        source_data = typed_frame(source_data)
+        source_table = Table.from_pandas(source_data, schema=frame_schema(source_data), preserve_index=False)
+    else:
+        row_group_size = max([column.size for column in source_data.values()
+                              if getattr(column, 'ndim', 1) > 1] + [0]) or None
+        source_table = dict_table(source_data)
+    file_rows = None
+    if row_group_size is None:
+        sort_column = spec.get('sort_by', {}).get(compression_name or source_name)
+        if sort_column in source_table.column_names:
+            source_table = source_table.sort_by(sort_column)
+        row_group_size = ROW_GROUP_ROWS
+        file_rows = int(spec.get('dataset_file_rows', DATASET_FILE_ROWS))
+    write_source(source_table, source_name, codec, level, row_group_size, file_rows)
+    table_stats(source_name, source_table)
+    if spec.get('ipc_cache', True):
+        write_cache(source_table, source_name)
+
+def dict_table(source_data:dict) -> Table:
+    """
+    Arrow table of a dictionary of Numpy arrays,
+     flattening multidimensional columns and keeping their shape in their field metadata.
+    :param source_data: Dictionary of Numpy arrays.
+    :return: Arrow table.
     """
-    metadata = {'shapes': []}
-    single_dim = True
-    data_schema = schema([], metadata={'shape': b''})
+    data_schema = schema([])
     for column in source_data:
-        for row in source_data[column]:
-            if hasattr(row, 'shape'):
-                if len(row.shape) > 0:
-                    single_dim = False
-        if not single_dim:
-            single_dim = True
-            metadata['shapes'].append(source_data[column].shape)
-            source_data[column] = source_data[column].reshape(-1)
-            source_field = field(column, from_numpy_dtype(source_data[column][0].dtype))
-            data_schema = data_schema.append(source_field)
-        else:
-            data_schema = data_schema.append(field(column, from_numpy_dtype(source_data[column].dtype)))
-    shapes = ''.join(str(metadata['shapes'])).encode()
-    data_schema = data_schema.with_metadata({'shape': shapes})
-    source_table = Table.from_pydict(source_data, data_schema)
-    write_table(source_table, 'saved/data/%s.pqt' % source_name, compression='GZIP')
+        column_data = source_data[column]
+        shape = None
+        if getattr(column_data, 'ndim', 1) > 1:
+            shape = {'shape': dumps(list(column_data.shape))}
+            source_data[column] = column_data.reshape(-1)
+        data_schema = data_schema.append(field(column, from_numpy_dtype(column_data.dtype), metadata=shape))
+    return Table.from_pydict(source_data, data_schema)
 
 def save_plot_map(plot_obj):
     """
     Takes a copy of plot map from its PlotMap,
-     modifies existing data to JSON format,
+     replaces its data with a reference to the saved data source,
      saves plot map in JSON format.
     :param plot_obj: Instance of PlotMap.
     """
-    plot_map = deepcopy(plot_obj.plot_map)
-    if plot_map['data'] is not None:
-        plot_map['data'] = dumps(plot_map['data'], cls=NumpyEncoder)
-    with open('saved/plots/plot_map_%s.json' % plot_obj.plot_map['id'], 'w') as f:
-        dump(str(plot_map), f, separators=(',', ':'), sort_keys=True, indent=4)
+    plot_map = plot_obj.plot_map
+    write_plot_map(plot_map, data_reference(plot_map['data_name']) if plot_map['data'] is not None else None)
+
+def write_plot_map(plot_map:dict, reference:Union[dict, None]):
+    """
+    Saves a plot map in JSON format,
+     with a reference of data source name and version in place of its data.
+    :param plot_map: Plot map dictionary.
+    :param reference: Data source reference, None if plot map has no data.
+    """
+    saved = {key: value for key, value in plot_map.items() if key != 'data'}
+    saved['data'] = reference
+    with open('saved/plots/plot_map_%s.json' % plot_map['id'], 'w') as f:
+        dump(saved, f, separators=(',', ':'), sort_keys=True, indent=4)
+
+def read_plot_map(main_win, file_name:str) -> dict:
+    """
+    Read a saved JSON plot map,
+     migrating plot maps saved with their data embedded to the reference format.
+    A migrated plot map is only rewritten once its embedded data is saved as a data source,
+     otherwise the original file is left as it is.
+    Settings added since the plot map was saved are set to their defaults.
+    :param main_win: Main Window, parent of any warning.
+    :param file_name: Plot map JSON file name.
+    :return: Plot map dictionary, data still as a reference.
+    """
+    with open('saved/plots/%s' % file_name, 'r') as f:
+        plot = load(f)
+    if isinstance(plot, str):
+        plot = literal_eval(plot)
+        embedded = plot['data'] is not None
+        plot = migrate_plot_map(main_win, plot)
+        if plot['data'] is not None or not embedded:
+            write_plot_map(plot, plot['data'])
+    for key, value in PLOT.items():
+        plot.setdefault(key, deepcopy(value))
+    return plot
+
+def migrate_plot_map(main_win, plot:dict) -> dict:
+    """
+    Convert a plot map saved with its data embedded,
+     to reference its data source instead.
+    Embedded data without a saved data source is saved as one,
+     so it is not lost.
+    :param main_win: Main Window, parent of any warning.
+    :param plot: Plot map from the embedded format.
+    :return: Plot map with a data reference.
+    """
+    from resources.modules.catalog import catalog
+    if plot['data'] is not None:
+        if data_reference(plot['data_name']) is None:
+            try:
+                data_obj = loads(plot['data'])
+                if isinstance(data_obj, str):
+                    data = read_json(StringIO(data_obj))
+                elif isinstance(data_obj, dict):
+                    data = {column: array(data_obj[column]) for column in data_obj}
+                else:
+                    data = None
+                if data is not None:
+                    plot['data_name'] = plot['data_name'] or 'plot_map_%s_data' % plot['id']
+                    save_data_as_parquet(data, plot['data_name'])
+                    catalog().refresh_entry(plot['data_name'])
+            except (ArrowException, ValueError):
+                pass
+        plot['data'] = data_reference(plot['data_name'])
+        if plot['data'] is None:
+            bad_data_msg(main_win)
+    return plot
+
+def resolve_plot_data(main_win, plot:dict) -> dict:
+    """
+    Replace a plot map data reference with the data it references, through Data.
+    Only the plotted columns of a flat data source are read.
+    Coordinates no longer in a data source, that has changed since saving, are cleared.
+    :param main_win: Main Window, parent of any warning.
+    :param plot: Plot map with a data reference.
+    :return: Plot map with data.
+    """
+    reference = plot['data']
+    plot['data'] = None
+    if reference is not None:
+        current = data_reference(reference['name'])
+        if current is None:
+            bad_data_msg(main_win)
+            return plot
+        coords = ('x_coord', 'y_coord', 'z_coord')
+        columns = [plot[coord] for coord in coords if plot[coord]]
+        plot['data'] = load_data(reference['name'], columns)
+        if current['version'] != reference['version']:
+            for coord in coords:
+                if plot[coord] and plot[coord] not in plot['data']:
+                    plot[coord] = ''
+    return plot
+
+def bad_data_msg(main_win):
+    """
+    Notify that plot map data could not be found.
+    :param main_win: Main Window.
+    """
+    QMessageBox.critical(main_win, 'Bad Data, No Dataframe For You!',
+                         'Data is invalid or corrupted.\n'
+                         'It has been deleted,\n'
+                         'try reloading from source again.',
+                         buttons=QMessageBox.StandardButton.Ok,
+                         defaultButton=QMessageBox.StandardButton.Ok)
 
 def load_plot_maps(main_win, load_all:bool):
     """
     Creates instances of PlotMap module
      from saved JSON plot maps
      or create new instance of a plot map.
+    Saved plot maps are loaded as PlotMapPlaceholder instances,
+     only built with their data once their tab is activated.
     :param main_win: Instance of Main Window passed to PlotMap.
     :param load_all: True if loading all saved JSON plot maps.
                      False if creating an individual plot map.
-    :return: list of created PlotMap instances.
+    :return: list of created PlotMap or PlotMapPlaceholder instances.
     """
     plots = []
     plot_id = 1
     plots_json = sorted(listdir('saved/plots'))
     if load_all:
         for p in plots_json:
-            with open('saved/plots/%s' % p, 'r') as f:
-                plot = literal_eval(load(f))
-                if plot['data'] is not None:
-                    data_obj = loads(plot['data'])
-                    if isinstance(data_obj, str):
-                        plot['data'] = read_json(StringIO(data_obj))
-                    elif isinstance(data_obj, dict):
-                        for column in data_obj:
-                            data_obj[column] = array(data_obj[column])
-                        plot['data'] = data_obj
-                    else:
-                        plot['data'] = None
-                        QMessageBox.critical(main_win, 'Bad Data, No Dataframe For You!',
-                                             'Data is invalid or corrupted.\n'
-                                             'It has been deleted,\n'
-                                             'try reloading from source again.',
-                                             buttons=QMessageBox.StandardButton.Ok,
-                                             defaultButton=QMessageBox.StandardButton.Ok)
-                plots.append(PlotMap(main_win, plot))
+            plots.append(PlotMapPlaceholder(main_win, read_plot_map(main_win, p)))
         return plots
     for i in range(1, max(1, len(plots_json) + 2)):
         plot_id = '%02d' % i
@@ -163,22 +462,6 @@ def load_plot_maps(main_win, load_all:bool):
     return plots
 
 
-class NumpyEncoder(JSONEncoder):
-    def default(self, obj:  Union[DataFrame, ndarray]):
-        """
-        Re-instance JSONEncoder
-         to handle different plot map data types
-         into JSON format.
-        :param obj: Plot map data.
-        :return: JSON object.
-        """
-        if isinstance(obj, ndarray):
-            return obj.tolist()
-        elif isinstance(obj, DataFrame):
-            return obj.to_json()
-        return super().default(obj)
-
-
 class WaitTimer(QThread):
     prog = pyqtSignal(float)
     fin = pyqtSignal()